@@ -1,3 +1,10 @@
+import sys
+
+from src.utils.startup_profiler import StartupProfiler
+
+# Installed before anything else is imported, so the report covers the whole cold start.
+startup_profiler = StartupProfiler.install_from_argv()
+
 import asyncio
 import logging
 import os
@@ -10,7 +17,9 @@ from dotenv import load_dotenv
 
 from src.bot.helper import BotHelper
 from src.config.cliargs import CLIArgs
+from src.exporters.transcript_export import EXPORT_FORMATS, TRANSCRIPT_LOG_DIRECTORY, DailyTranscriptLogHandler, export_transcript
 from src.utils.commandline import CommandLine
+from src.utils.diagnostics import MemoryTracker, profile_threads, sink_memory_report
 from src.utils.pdf_generator import pdf_generator
 
 load_dotenv()
@@ -28,15 +37,11 @@ def configure_logging():
     logging.getLogger('httpcore').setLevel(logging.WARNING)
 
     # Ensure the directory exists
-    log_directory = '.logs/transcripts'
+    log_directory = TRANSCRIPT_LOG_DIRECTORY
     pdf_directory = '.logs/pdfs'
     os.makedirs(log_directory, exist_ok=True) 
     os.makedirs(pdf_directory, exist_ok=True)  
 
-    # Get the current date for the log file name
-    current_date = datetime.now().strftime('%Y-%m-%d')
-    log_filename = os.path.join(log_directory, f"{current_date}-transcription.log")
-
     # Custom logging format (date with milliseconds, message)
     log_format = '%(asctime)s %(name)s: %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S.%f'[:-3]  # Trim to milliseconds
@@ -56,8 +61,8 @@ def configure_logging():
     transcription_logger = logging.getLogger('transcription')
     transcription_logger.setLevel(logging.INFO)
 
-    # File handler for transcription logs (append mode)
-    file_handler = logging.FileHandler(log_filename, mode='a')
+    # File handler for transcription logs (append mode), a new file every day
+    file_handler = DailyTranscriptLogHandler(log_directory)
     file_handler.setLevel(logging.INFO)
     
     # Custom formatter WITHOUT the automatic timestamp
@@ -74,13 +79,43 @@ if __name__ == "__main__":
 
     configure_logging()
     loop = asyncio.get_event_loop()
+
+    if CLIArgs.mode == "worker":
+        from src.inference.worker import run_worker
+
+        try:
+            loop.run_until_complete(run_worker(CLIArgs.workers))
+        except KeyboardInterrupt:
+            logger.info("^C received, shutting down worker...")
+        finally:
+            loop.close()
+        sys.exit(0)
     
+    if CLIArgs.mode == "transcript-consumer":
+        from src.publishers.transcript_consumer import run_transcript_consumer
+
+        try:
+            loop.run_until_complete(run_transcript_consumer())
+        except KeyboardInterrupt:
+            logger.info("^C received, shutting down transcript consumer...")
+        finally:
+            loop.close()
+        sys.exit(0)
+
     from src.bot.volo_bot import VoloBot  
     
-    bot = VoloBot(loop)
+    if startup_profiler:
+        startup_profiler.budget = CLIArgs.startup_budget
+
+    memory_tracker = MemoryTracker()
+
+    bot = VoloBot(loop, shard_id=CLIArgs.shard_id, shard_count=CLIArgs.shard_count,
+                  inference_workers=CLIArgs.workers, startup_profiler=startup_profiler)
 
     @bot.event
     async def on_voice_state_update(member, before, after):
+        if member.id != bot.user.id and after.channel is not None and after.channel != before.channel:
+            bot.on_party_member_update(member, after.channel)
         if member.id == bot.user.id:
             # If the bot left the "before" channel
             if after.channel is None:
@@ -91,6 +126,7 @@ if __name__ == "__main__":
                     bot.guild_to_helper.pop(guild_id, None)
 
                 bot._close_and_clean_sink_for_guild(guild_id)
+                bot.end_session(guild_id)
 
     @bot.slash_command(name="connect", description="Add VOLO to your voice party.")
     async def connect(ctx: discord.context.ApplicationContext):
@@ -154,15 +190,23 @@ if __name__ == "__main__":
             await ctx.respond("Well, that’s awkward. 😐 Was I suppose to be writing?", ephemeral=True)
             return
 
-        await ctx.trigger_typing()
+        # Draining and summarising can take longer than discord waits for a response.
+        await ctx.defer()
         
         if bot.guild_is_recording.get(guild_id, False):
+            await bot.drain_sink(ctx)
             await bot.get_transcription(ctx)
             bot.stop_recording(ctx)
             bot.guild_is_recording[guild_id] = False
             await ctx.respond("The quill rests. 🖋️ A pause, but not the end. Awaiting your next grand tale, of course!", ephemeral=False)
             #await bot.get_transcription(ctx)
             bot.cleanup_sink(ctx)
+            summary = await bot.finish_summary(ctx)
+            if summary:
+                embed = discord.Embed(title="VOLO's Take 📜",
+                                      description=summary[:4096],
+                                      color=discord.Color.dark_gold())
+                await ctx.send_followup(embed=embed)
         
     @bot.slash_command(name="disconnect", description="VOLO leaves your party. Goodbye, friend.")
     async def disconnect(ctx: discord.context.ApplicationContext):
@@ -211,7 +255,33 @@ if __name__ == "__main__":
             await ctx.respond("No transcription file could be generated.", ephemeral=True)
 
 
-    @bot.slash_command(name="update_player_map", description="Updates the player_map. If `PLAYER_MAP_FILE_PATH` is defined writes info to that location.")
+    @bot.slash_command(name="export", description="Export the transcriptions as JSONL, SRT, VTT or Markdown.")
+    async def export(
+        ctx: discord.context.ApplicationContext,
+        format: discord.Option(str, choices=EXPORT_FORMATS, default="md"),
+        date: discord.Option(str, description="Day to export as YYYY-MM-DD, defaults to today.", required=False),
+    ):
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        await ctx.defer()
+        records = bot.iter_transcript_records(ctx.guild_id, date)
+        # Streams straight from the log or store into gzip parts that fit the server's upload limit.
+        paths = await asyncio.to_thread(
+            export_transcript, records, format,
+            basename=f"session_transcription_{date}", part_bytes=ctx.guild.filesize_limit)
+        if not paths:
+            await ctx.respond("I'm sorry, but it appears I have no transcriptions to write into the tome.", ephemeral=True)
+            return
+        try:
+            for index, path in enumerate(paths):
+                with open(path, "rb") as f:
+                    discord_file = discord.File(f, filename=os.path.basename(path))
+                    message = "Here is the transcription from this session:" if index == 0 else f"Part {index + 1} of {len(paths)}"
+                    await ctx.respond(message, file=discord_file)
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    @bot.slash_command(name="update_player_map", description="Updates the player_map from your voice party and saves it for this server.")
     async def update_player_map(ctx: discord.context.ApplicationContext):
         if bot.guild_is_recording.get(ctx.guild_id, False):
             await ctx.respond("I'm sorry, I am already scribing for a set of true names ..", ephemeral=True)
@@ -224,6 +294,38 @@ if __name__ == "__main__":
             raise e
 
 
+    @bot.slash_command(name="volo_debug", description="Owner only: profile threads or memory of the running bot.")
+    async def volo_debug(
+        ctx: discord.context.ApplicationContext,
+        action: discord.Option(str, choices=["profile", "memory_start", "memory_diff", "memory_stop", "sinks"]),
+        seconds: discord.Option(int, default=10, min_value=1, max_value=120),
+    ):
+        if not await bot.is_owner(ctx.author):
+            await ctx.respond("Only my keeper may peer into my inner workings.", ephemeral=True)
+            return
+        await ctx.defer(ephemeral=True)
+        try:
+            path = None
+            if action == "profile":
+                lines, path = await asyncio.to_thread(profile_threads, seconds)
+            elif action == "memory_start":
+                memory_tracker.start()
+                lines = ["Memory tracing started, run memory_diff to compare against now."]
+            elif action == "memory_diff":
+                lines, path = await asyncio.to_thread(memory_tracker.diff)
+            elif action == "memory_stop":
+                memory_tracker.stop()
+                lines = ["Memory tracing stopped."]
+            else:
+                lines, path = await asyncio.to_thread(
+                    sink_memory_report, dict(bot.guild_whisper_sinks), bot.sink_supervisor.report())
+            text = "\n".join(lines)[:1800]
+            if path:
+                text += f"\n\nFull report: {path}"
+            await ctx.respond(f"```\n{text}\n```", ephemeral=True)
+        except Exception as e:
+            await ctx.respond(f"Unable to run {action}:\n{e}", ephemeral=True)
+
     @bot.slash_command(name="help", description="Show the help message.")
     async def help(ctx: discord.context.ApplicationContext):
         embed_fields = [
@@ -237,6 +339,8 @@ if __name__ == "__main__":
                 name="/stop", value="Stop the transcription.", inline=True),
             discord.EmbedField(
                 name="/generate_pdf", value="Generate a PDF of the transcriptions.", inline=True),
+            discord.EmbedField(
+                name="/export", value="Export the transcriptions as JSONL, SRT, VTT or Markdown.", inline=True),
             discord.EmbedField(
                 name="/help", value="Show the help message.", inline=True),
         ]
@@ -251,10 +355,13 @@ if __name__ == "__main__":
 
 
     try:
+        if startup_profiler:
+            startup_profiler.mark_login()
         loop.run_until_complete(bot.start(DISCORD_BOT_TOKEN))
     except KeyboardInterrupt:
         logger.info("^C received, shutting down...")
-        asyncio.run(bot.stop_and_cleanup())
+        # Drain on the bot's own loop, remote inference replies are delivered through it.
+        loop.run_until_complete(bot.stop_and_cleanup())
     finally:
         # Close all connections
         loop.run_until_complete(bot.close_consumers())
@@ -266,4 +373,7 @@ if __name__ == "__main__":
 
         # Close the loop
         loop.run_until_complete(bot.close())
-        loop.close()
\ No newline at end of file
+        loop.close()
+
+    if startup_profiler and startup_profiler.over_budget:
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+
+import yaml
+
+PARTICIPANT_MAP_DIRECTORY = os.getenv("PARTICIPANT_MAP_DIRECTORY", ".logs/player_maps")
+
+logger = logging.getLogger(__name__)
+
+
+class ParticipantIndex:
+    """
+    Player and character names for one guild's voice party.
+
+    Users are resolved on their first packet, from this guild's saved names, the shared
+    `PLAYER_MAP_FILE_PATH` map or else the discord member, instead of walking every guild member.
+    Only names that differ from the shared map are kept, and written to a per-guild file.
+
+    Passed to the sink as its `player_map`, so lookups keep the `.get(user_id, default)` shape.
+    """
+
+    def __init__(self, guild, base_map=None, directory=PARTICIPANT_MAP_DIRECTORY):
+        self.guild = guild
+        self.base_map = base_map or {}
+        self.path = os.path.join(directory, f"{guild.id}.yml")
+        self.lock = threading.Lock()
+        # One write at a time, an older snapshot must never replace a newer file.
+        self.write_lock = asyncio.Lock()
+        self.entries = {}
+        self.party = set()
+        self.dirty = False
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.entries = yaml.safe_load(file) or {}
+
+    def get(self, user_id, default=None):
+        self.party.add(user_id)
+        user_map = self.entries.get(user_id) or self.base_map.get(user_id)
+        if user_map:
+            return user_map
+        member = self.guild.get_member(user_id)
+        if member is None:
+            return default
+        return self.add_member(member)
+
+    def values(self):
+        """Names of the users seen in the voice party, used to build the whisper prompt."""
+        return [self.get(user_id, {}) for user_id in list(self.party)]
+
+    def add_member(self, member, overwrite=False):
+        """Record a discord member of the voice party, returns their names."""
+        self.party.add(member.id)
+        user_map = {"player": member.name, "character": member.display_name}
+        with self.lock:
+            known = self.entries.get(member.id) or self.base_map.get(member.id)
+            if known and not overwrite:
+                return known
+            if self.base_map.get(member.id) == user_map:
+                if self.entries.pop(member.id, None) is not None:
+                    self.dirty = True
+            elif self.entries.get(member.id) != user_map:
+                self.entries[member.id] = user_map
+                self.dirty = True
+        return user_map
+
+    def add_voice_members(self, channel, overwrite=False):
+        for member in channel.members:
+            if not member.bot:
+                self.add_member(member, overwrite=overwrite)
+
+    async def persist(self):
+        """Write the guild's names off the event loop, only when something changed."""
+        async with self.write_lock:
+            # Snapshot once the previous write is done, so the last write has the newest names.
+            with self.lock:
+                if not self.dirty:
+                    return
+                entries = dict(self.entries)
+                self.dirty = False
+            try:
+                await asyncio.to_thread(self._write, entries)
+            except Exception:
+                with self.lock:
+                    self.dirty = True
+                raise
+
+    def _write(self, entries):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        # Write next to the target and swap it in, a crash never leaves a half written file.
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as file:
+            yaml.dump(entries, file, default_flow_style=False, allow_unicode=True)
+            temp_path = file.name
+        os.replace(temp_path, self.path)
+        logger.debug(f"Saved {len(entries)} participant names to {self.path}.")
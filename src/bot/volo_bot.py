@@ -7,7 +7,18 @@ from collections import defaultdict
 import discord
 import yaml
 
-from src.sinks.whisper_sink import WhisperSink
+from src.bot.participants import ParticipantIndex
+from src.exporters.transcript_export import iter_day_records
+from src.inference.broker import InMemoryBroker, create_broker
+from src.inference.client import InferenceClient
+from src.inference.worker import InferenceWorker
+from src.publishers.transcript_consumer import TranscriptConsumer
+from src.publishers.transcript_publisher import TRANSCRIPT_BROKER, TranscriptPublisher
+from src.sinks.prompt_context import PromptContext
+from src.sinks.supervisor import SinkSupervisor
+from src.summary.session_summarizer import SessionSummarizer, create_summary_backend
+from src.sinks.whisper_sink import WhisperSink, get_audio_model, local_transcribe
+from src.store.transcript_store import TRANSCRIPT_STORE_PATH, TranscriptStore, iter_store_records
 
 DISCORD_CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID"))
 TRANSCRIPTION_METHOD = os.getenv("TRANSCRIPTION_METHOD")
@@ -17,18 +28,34 @@ PLAYER_MAP_FILE_PATH = os.getenv("PLAYER_MAP_FILE_PATH")
 logger = logging.getLogger(__name__)
 
 class VoloBot(discord.Bot):
-    def __init__(self, loop):
+    def __init__(self, loop, shard_id=None, shard_count=None, inference_workers=1, startup_profiler=None):
 
         super().__init__(command_prefix="!", loop=loop,
+                         shard_id=shard_id, shard_count=shard_count,
                          activity=discord.CustomActivity(name='Transcribing Audio to Text'))
         self.guild_to_helper = {}
         self.guild_is_recording = {}
         self.guild_whisper_sinks = {}
         self.guild_whisper_message_tasks = {}
+        self.guild_prompt_contexts = {}
+        self.guild_participants = {}
+        self.guild_summarizers = {}
+        self.sink_supervisor = SinkSupervisor(loop, on_give_up=self._on_sink_given_up)
+        self.summary_backend = create_summary_backend()
         self.player_map = {}
         self._is_ready = False
+        self.startup_profiler = startup_profiler
+        self.inference_workers = inference_workers
+        self.inference_broker = None
+        self.inference_client = None
+        self.local_inference_workers = []
+        self.transcript_broker = None
+        self.transcript_publisher = None
+        self.transcript_store = None
         if TRANSCRIPTION_METHOD == "openai":
             self.transcriber_type = "openai"
+        elif TRANSCRIPTION_METHOD == "remote":
+            self.transcriber_type = "remote"
         else:
             self.transcriber_type = "local"
         if PLAYER_MAP_FILE_PATH:
@@ -39,11 +66,70 @@ class VoloBot(discord.Bot):
 
     async def on_ready(self):
         logger.info(f"Logged in as {self.user} to Discord.")
+        await self.start_inference_client()
+        await self.start_transcript_publisher()
         self._is_ready = True
+        if self.startup_profiler and self.startup_profiler.ready_at is None:
+            self.startup_profiler.mark_ready()
+            if self.startup_profiler.over_budget:
+                await self.close()
+
+    async def start_inference_client(self):
+        """
+        Connect this shard to the shared inference tier when transcribing remotely.
+
+        Without RabbitMQ configured, the in-memory broker is served by workers on this
+        event loop so the remote path also works in a single process.
+        """
+        if self.transcriber_type != "remote" or self.inference_client:
+            return
+        self.inference_broker = create_broker()
+        await self.inference_broker.connect()
+        if isinstance(self.inference_broker, InMemoryBroker):
+            # Load the model for all in-process workers at once, in the background.
+            self.loop.run_in_executor(None, get_audio_model, False, self.inference_workers)
+            for _ in range(self.inference_workers):
+                worker = InferenceWorker(self.inference_broker, local_transcribe)
+                await worker.start()
+                self.local_inference_workers.append(worker)
+        self.inference_client = InferenceClient(self.inference_broker, self.shard_id)
+        await self.inference_client.start()
+        logger.info(f"Shard {self.shard_id} sending utterances to {self.inference_client.reply_queue}.")
 
 
     async def close_consumers(self):
-        await self.consumer_manager.close()
+        for worker in self.local_inference_workers:
+            worker.close()
+        self.local_inference_workers.clear()
+        if self.inference_broker:
+            await self.inference_broker.close()
+            self.inference_broker = None
+        self.inference_client = None
+        if self.transcript_publisher:
+            await self.transcript_publisher.close()
+            self.transcript_publisher = None
+        if self.transcript_broker:
+            await self.transcript_broker.close()
+            self.transcript_broker = None
+        if self.transcript_store:
+            self.transcript_store.close()
+            self.transcript_store = None
+
+    async def start_transcript_publisher(self):
+        """
+        Publish transcript records to `TRANSCRIPT_BROKER` when configured.
+
+        With the in-memory broker the consumer also runs here and writes into the local store,
+        with RabbitMQ it runs separately as `main.py --mode transcript-consumer`.
+        """
+        if not TRANSCRIPT_BROKER or self.transcript_publisher:
+            return
+        self.transcript_broker = create_broker(TRANSCRIPT_BROKER)
+        if isinstance(self.transcript_broker, InMemoryBroker):
+            self.transcript_store = TranscriptStore()
+            await TranscriptConsumer(self.transcript_broker, self.transcript_store).start()
+        self.transcript_publisher = TranscriptPublisher(self.transcript_broker, self.loop)
+        await self.transcript_publisher.start()
 
     def _close_and_clean_sink_for_guild(self, guild_id: int):
         whisper_sink: WhisperSink | None = self.guild_whisper_sinks.get(
@@ -51,6 +137,7 @@ class VoloBot(discord.Bot):
 
         if whisper_sink:
             logger.debug(f"Stopping whisper sink, requested by {guild_id}.")
+            self.sink_supervisor.forget(guild_id)
             whisper_sink.stop_voice_thread()
             del self.guild_whisper_sinks[guild_id]
             whisper_sink.close()
@@ -84,29 +171,52 @@ class VoloBot(discord.Bot):
 
         transcript_queue = asyncio.Queue()
 
+        summarizer = None
+        if self.summary_backend:
+            summarizer = SessionSummarizer(self.summary_backend, self.loop)
+            self.guild_summarizers[ctx.guild_id] = summarizer
+
+        vc = self.guild_to_helper[ctx.guild_id].vc
+        participants = self.participants_for(ctx.guild)
+        participants.add_voice_members(vc.channel)
+        self.loop.create_task(participants.persist())
+
+        prompt_context = self.guild_prompt_contexts.get(ctx.guild_id, None)
+        if prompt_context is None:
+            prompt_context = PromptContext.for_session(participants)
+            self.guild_prompt_contexts[ctx.guild_id] = prompt_context
+
         whisper_sink = WhisperSink(
             transcript_queue,
             self.loop,
             data_length=50000,
             max_speakers=10,
             transcriber_type=self.transcriber_type,
-            player_map=self.player_map,
+            player_map=participants,
+            prompt_context=prompt_context,
+            inference_client=self.inference_client,
+            transcript_subscribers=[s for s in (self.transcript_publisher, summarizer) if s],
         )
 
-        self.guild_to_helper[ctx.guild_id].vc.start_recording(
+        vc.start_recording(
             whisper_sink, on_stop_record_callback, ctx)
 
-        def on_thread_exception(e):
-            logger.warning(
-                f"Whisper sink thread exception for guild {ctx.guild_id}. Retry in 5 seconds...\n{e}")
-            self._close_and_clean_sink_for_guild(ctx.guild_id)
+        self.sink_supervisor.watch(ctx.guild_id, whisper_sink)
 
-            # retry in 5 seconds
-            self.loop.call_later(5, self.start_recording, ctx)
+        self.guild_whisper_sinks[ctx.guild_id] = whisper_sink
 
-        whisper_sink.start_voice_thread(on_exception=on_thread_exception)
+    def _on_sink_given_up(self, guild_id: int):
+        helper = self.guild_to_helper.get(guild_id, None)
+        self.guild_is_recording[guild_id] = False
+        if helper and helper.vc and helper.vc.recording:
+            helper.vc.stop_recording()
+        self._close_and_clean_sink_for_guild(guild_id)
+        self.end_session(guild_id)
 
-        self.guild_whisper_sinks[ctx.guild_id] = whisper_sink
+    def end_session(self, guild_id: int):
+        """Forget the guild's summary and prompt when its sink is closed without /stop."""
+        self.guild_summarizers.pop(guild_id, None)
+        self.guild_prompt_contexts.pop(guild_id, None)
 
     def stop_recording(self, ctx: discord.context.ApplicationContext):
         vc = ctx.guild.voice_client
@@ -121,9 +231,28 @@ class VoloBot(discord.Bot):
             whisper_message_task.cancel()
             del self.guild_whisper_message_tasks[guild_id]
 
+    async def drain_sink(self, ctx: discord.context.ApplicationContext):
+        """Flush the buffered speakers of the guild's sink without blocking the event loop."""
+        whisper_sink = self.guild_whisper_sinks.get(ctx.guild_id, None)
+        if whisper_sink is None:
+            return None
+        return await self.loop.run_in_executor(None, whisper_sink.drain)
+
+    async def finish_summary(self, ctx: discord.context.ApplicationContext):
+        """VOLO's take on the session that just stopped, None when summaries are off or nothing was said."""
+        summarizer = self.guild_summarizers.pop(ctx.guild_id, None)
+        if summarizer is None:
+            return None
+        return await summarizer.finish() or None
+
     def cleanup_sink(self, ctx: discord.context.ApplicationContext):
         guild_id = ctx.guild_id
         self._close_and_clean_sink_for_guild(guild_id)
+        # The next /scribe is a new session, rebuild its prompt.
+        self.guild_prompt_contexts.pop(guild_id, None)
+        participants = self.guild_participants.get(guild_id, None)
+        if participants:
+            self.loop.create_task(participants.persist())
 
     async def get_transcription(self, ctx: discord.context.ApplicationContext):
         # Get the transcription queue
@@ -139,29 +268,59 @@ class VoloBot(discord.Bot):
             transcriptions.append(await transcriptions_queue.get())
         return transcriptions
 
+    def participants_for(self, guild) -> ParticipantIndex:
+        participants = self.guild_participants.get(guild.id, None)
+        if participants is None:
+            participants = ParticipantIndex(guild, self.player_map)
+            self.guild_participants[guild.id] = participants
+        return participants
+
+    def on_party_member_update(self, member, channel):
+        """Keep the guild's participant names current as users join the bot's voice channel."""
+        participants = self.guild_participants.get(member.guild.id, None)
+        helper = self.guild_to_helper.get(member.guild.id, None)
+        if participants is None or member.bot or not helper or not helper.vc or helper.vc.channel != channel:
+            return
+        participants.add_member(member)
+        self.loop.create_task(participants.persist())
+
+    def iter_transcript_records(self, guild_id: int, date: str):
+        """
+        Lazily read a day of the guild's transcript, from the transcript store when transcripts are
+        published, otherwise from the transcription logs.
+        """
+        if TRANSCRIPT_BROKER and os.path.exists(TRANSCRIPT_STORE_PATH):
+            return iter_store_records(TRANSCRIPT_STORE_PATH, guild_id=guild_id, date=date)
+        return iter_day_records(date, guild_id)
+
     async def update_player_map(self, ctx: discord.context.ApplicationContext):
-        player_map = {}
-        for member in ctx.guild.members:
-            player_map[member.id] = {
-                "player": member.name,
-                "character": member.display_name
-            }
-        logger.info(f"{str(player_map)}")
-        self.player_map.update(player_map)
-        if PLAYER_MAP_FILE_PATH:
-            with open(PLAYER_MAP_FILE_PATH, "w", encoding="utf-8") as file:
-                yaml.dump(self.player_map, file, default_flow_style=False, allow_unicode=True)
+        helper = self.guild_to_helper.get(ctx.guild_id, None)
+        channel = helper.vc.channel if helper and helper.vc else getattr(ctx.author.voice, "channel", None)
+        if channel is None:
+            raise ValueError("No voice party to read the names from.")
+        participants = self.participants_for(ctx.guild)
+        participants.add_voice_members(channel, overwrite=True)
+        logger.info(f"{str(participants.entries)}")
+        self.guild_prompt_contexts.pop(ctx.guild_id, None)
+        await participants.persist()
 
     async def stop_and_cleanup(self):
-        try:
-            for sink in self.guild_whisper_sinks.values():
+        """Drain and close every guild's sink, run on the bot loop so remote inference can still answer."""
+        async def drain_and_close(guild_id, sink):
+            try:
+                await self.loop.run_in_executor(None, sink.drain)
+            except Exception as e:
+                logger.error(f"Error draining whisper sink for guild {guild_id}: {e}")
+            try:
                 sink.close()
-                sink.stop_voice_thread()
-                logger.debug(
-                    f"Stopped whisper sink for guild {sink.vc.channel.guild.id} in cleanup.")
+                logger.debug(f"Stopped whisper sink for guild {guild_id} in cleanup.")
+            except Exception as e:
+                logger.error(f"Error closing whisper sink for guild {guild_id}: {e}")
+
+        try:
+            await asyncio.gather(*(
+                drain_and_close(guild_id, sink) for guild_id, sink in list(self.guild_whisper_sinks.items())))
             self.guild_whisper_sinks.clear()
-        except Exception as e:
-            logger.error(f"Error stopping whisper sinks: {e}")
         finally:
             logger.info("Cleanup completed.")
     
\ No newline at end of file
@@ -3,4 +3,10 @@ from src.utils.commandline import CommandLine
 
 class CLIArgs(CommandLine):
     verbose = False
-    transcriber_type = "local"
\ No newline at end of file
+    transcriber_type = "local"
+    mode = "bot"
+    shard_id = None
+    shard_count = None
+    workers = 1
+    profile_startup = False
+    startup_budget = None
\ No newline at end of file
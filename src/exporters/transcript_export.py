@@ -0,0 +1,200 @@
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from src.store.transcript_store import iter_store_records
+
+EXPORT_DIRECTORY = ".logs/exports"
+TRANSCRIPT_LOG_DIRECTORY = ".logs/transcripts"
+# Discord's attachment limit for servers without boosts, /export uses the guild's own limit.
+DEFAULT_PART_BYTES = 10 * 1024 * 1024
+# gzip holds back compressed output, leave room for what is still buffered when a part is closed.
+PART_MARGIN_BYTES = 256 * 1024
+EXPORT_FORMATS = ["jsonl", "srt", "vtt", "md"]
+
+
+def iter_log_records(path, guild_id=None, date=None):
+    """Yield the records of a transcription log file line by line, optionally only those of one day."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if guild_id is not None and record.get("guild_id") != guild_id:
+                continue
+            if date is None or record.get("date") == date:
+                yield record
+
+
+def transcript_log_path(date, directory=TRANSCRIPT_LOG_DIRECTORY):
+    """The transcription log main.py writes for a day, `date` as YYYY-MM-DD."""
+    return os.path.join(directory, f"{date}-transcription.log")
+
+
+def iter_day_records(date, guild_id=None, directory=TRANSCRIPT_LOG_DIRECTORY):
+    """
+    Yield a day's records from every transcription log that can hold them.
+
+    A record is dated by its first word but lands in the log of the day it was written, and logs
+    from before daily rotation hold whole runs of the bot. So every log up to the next day is read.
+    """
+    day_after = (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    for path in sorted(glob.glob(os.path.join(directory, "*-transcription.log"))):
+        if os.path.basename(path)[:10] <= day_after:
+            yield from iter_log_records(path, guild_id, date)
+
+
+class DailyTranscriptLogHandler(logging.FileHandler):
+    """Appends to the transcription log of the current day, switching files at midnight."""
+
+    def __init__(self, directory=TRANSCRIPT_LOG_DIRECTORY):
+        self.directory = directory
+        self.date = datetime.now().strftime("%Y-%m-%d")
+        super().__init__(transcript_log_path(self.date, directory), mode="a", encoding="utf-8")
+
+    def emit(self, record):
+        date = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d")
+        if date != self.date:
+            # emit runs under the handler lock, the next write opens the new day's file.
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(transcript_log_path(date, self.directory))
+            self.date = date
+        super().emit(record)
+
+
+def _record_time(record, key):
+    try:
+        return datetime.strptime(f"{record.get('date')} {record.get(key)}", "%Y-%m-%d %H:%M:%S.%f")
+    except (TypeError, ValueError):
+        return None
+
+
+def _speaker_name(record):
+    return record.get("character") or record.get("player") or str(record.get("user_id", "Unknown"))
+
+
+class JsonlWriter:
+    extension = "jsonl"
+    header = ""
+
+    def cue(self, record):
+        return json.dumps(record) + "\n"
+
+
+class SubtitleWriter:
+    """SRT cues timed from the first record of the export, one cue per utterance."""
+
+    extension = "srt"
+    header = ""
+    separator = ","
+
+    def __init__(self):
+        self.origin = None
+        self.index = 0
+
+    def _timestamp(self, moment):
+        seconds = max((moment - self.origin).total_seconds(), 0.0)
+        hours, rest = divmod(seconds, 3600)
+        minutes, rest = divmod(rest, 60)
+        return f"{int(hours):02d}:{int(minutes):02d}:{int(rest):02d}{self.separator}{int(rest % 1 * 1000):03d}"
+
+    def _text(self, record):
+        return f"{_speaker_name(record)}: {record.get('data', '').strip()}"
+
+    def cue(self, record):
+        begin = _record_time(record, "begin")
+        if begin is None:
+            return ""
+        end = _record_time(record, "end") or begin
+        if self.origin is None:
+            self.origin = begin
+        self.index += 1
+        return f"{self.index}\n{self._timestamp(begin)} --> {self._timestamp(end)}\n{self._text(record)}\n\n"
+
+
+class VttWriter(SubtitleWriter):
+    extension = "vtt"
+    header = "WEBVTT\n\n"
+    separator = "."
+
+    def _text(self, record):
+        return f"<v {_speaker_name(record)}>{record.get('data', '').strip()}"
+
+
+class MarkdownWriter:
+    extension = "md"
+    header = "# Session transcript\n\n"
+
+    def cue(self, record):
+        return f"**[{record.get('date', '')} {record.get('begin', '')}] {_speaker_name(record)}:** {record.get('data', '').strip()}\n\n"
+
+
+WRITERS = {"jsonl": JsonlWriter, "srt": SubtitleWriter, "vtt": VttWriter, "md": MarkdownWriter}
+
+
+def export_transcript(records, fmt, directory=EXPORT_DIRECTORY, basename="session_transcription",
+                      part_bytes=DEFAULT_PART_BYTES):
+    """
+    Stream records through a format writer into gzip files of at most `part_bytes` each.
+
+    Records are written as they are read, so memory stays flat whatever the session length.
+    Every part is a complete gzip file and starts with the format's header.
+
+    :return: Paths of the parts, in order. Empty when there were no records.
+    """
+    writer = WRITERS[fmt]()
+    os.makedirs(directory, exist_ok=True)
+    limit = max(part_bytes - PART_MARGIN_BYTES, PART_MARGIN_BYTES)
+    paths = []
+    raw = compressed = None
+    try:
+        for record in records:
+            text = writer.cue(record)
+            if not text:
+                continue
+            if compressed is None or raw.tell() >= limit:
+                if compressed is not None:
+                    compressed.close()
+                    raw.close()
+                paths.append(os.path.join(directory, f"{basename}.part{len(paths) + 1}.{writer.extension}.gz"))
+                raw = open(paths[-1], "wb")
+                compressed = gzip.GzipFile(filename=f"{basename}.{writer.extension}", mode="wb", fileobj=raw)
+                compressed.write(writer.header.encode("utf-8"))
+            compressed.write(text.encode("utf-8"))
+    finally:
+        if compressed is not None:
+            compressed.close()
+            raw.close()
+
+    if len(paths) == 1:
+        single = os.path.join(directory, f"{basename}.{writer.extension}.gz")
+        os.replace(paths[0], single)
+        paths = [single]
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a session transcript without loading it into memory.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="Transcription log file, e.g. .logs/transcripts/<date>-transcription.log")
+    source.add_argument("--store", help="Transcript store database, see TRANSCRIPT_STORE_PATH")
+    parser.add_argument("--guild-id", type=int, default=None)
+    parser.add_argument("--date", default=None, help="Only export this day (YYYY-MM-DD)")
+    parser.add_argument("--out", default=EXPORT_DIRECTORY)
+    parser.add_argument("--part-bytes", type=int, default=DEFAULT_PART_BYTES)
+    args = parser.parse_args()
+
+    if args.log:
+        records = iter_log_records(args.log, args.guild_id, args.date)
+    else:
+        records = iter_store_records(args.store, args.guild_id, args.date)
+    for path in export_transcript(records, args.format, args.out, part_bytes=args.part_bytes):
+        print(path)
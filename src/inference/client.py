@@ -0,0 +1,62 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from base64 import b64encode
+
+INFERENCE_QUEUE = "volo.inference"
+RESULT_QUEUE_PREFIX = "volo.results"
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceClient:
+    """
+    Sends utterances from a bot shard to the shared inference workers.
+
+    Every shard consumes its own result queue, so workers route each transcription back
+    to the shard that owns the guild via `reply_to`.
+
+    :param broker: Broker shared with the workers.
+    :param shard_id: Id of the shard this client runs in, used to name the result queue.
+    """
+
+    def __init__(self, broker, shard_id=None, timeout=INFERENCE_TIMEOUT_SECONDS):
+        self.broker = broker
+        self.reply_queue = f"{RESULT_QUEUE_PREFIX}.shard-{shard_id if shard_id is not None else 0}"
+        self.timeout = timeout
+        self.pending = {}
+
+    async def start(self):
+        await self.broker.consume(self.reply_queue, self._on_result, prefetch=1)
+
+    async def transcribe(self, wav_bytes: bytes, prompt=None, language=None, guild_id=None):
+        """Returns a dict with the transcribed `text` and the detected `language`."""
+        correlation_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.pending[correlation_id] = future
+        request = {
+            "audio": b64encode(wav_bytes).decode("ascii"),
+            "prompt": prompt,
+            "language": language,
+            "guild_id": guild_id,
+        }
+        try:
+            await self.broker.publish(
+                INFERENCE_QUEUE,
+                json.dumps(request).encode("utf-8"),
+                correlation_id=correlation_id,
+                reply_to=self.reply_queue,
+            )
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self.pending.pop(correlation_id, None)
+
+    async def _on_result(self, message):
+        future = self.pending.get(message.correlation_id, None)
+        if future is None or future.done():
+            logger.debug(f"Dropping result for unknown request {message.correlation_id}.")
+            return
+        future.set_result(json.loads(message.body))
@@ -0,0 +1,76 @@
+import asyncio
+import io
+import json
+import logging
+import time
+from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
+
+from src.inference.broker import create_broker
+from src.inference.client import INFERENCE_QUEUE
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceWorker:
+    """
+    Consumes utterances from the inference queue and replies with their transcription.
+
+    :param broker: Broker shared with the bot shards.
+    :param transcribe_fn: Called as `transcribe_fn(wav_file, prompt, language)` and returns `(text, language)`.
+    :param concurrency: Amount of utterances this worker transcribes at once.
+    """
+
+    def __init__(self, broker, transcribe_fn, concurrency=1):
+        self.broker = broker
+        self.transcribe_fn = transcribe_fn
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+    async def start(self):
+        await self.broker.consume(INFERENCE_QUEUE, self._on_request, prefetch=self.concurrency)
+        logger.info(f"Inference worker consuming {INFERENCE_QUEUE} with concurrency {self.concurrency}.")
+
+    async def _on_request(self, message):
+        request = json.loads(message.body)
+        wav_file = io.BytesIO(b64decode(request["audio"]))
+        started = time.time()
+        try:
+            text, language = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.transcribe_fn, wav_file, request.get("prompt"), request.get("language"))
+        except Exception as e:
+            logger.error(f"Error transcribing request {message.correlation_id}: {e}")
+            text, language = "", None
+        self.processed += 1
+        self.busy_seconds += time.time() - started
+
+        if message.reply_to:
+            await self.broker.publish(
+                message.reply_to,
+                json.dumps({"text": text, "language": language}).encode("utf-8"),
+                correlation_id=message.correlation_id,
+            )
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_worker(concurrency=1):
+    """Entry point for `main.py --mode worker`, serves the shared RabbitMQ queue until cancelled."""
+    # Only worker processes load the whisper model.
+    from src.sinks.whisper_sink import get_audio_model, local_transcribe
+
+    # The model has to run as many transcriptions at once as the worker hands it.
+    get_audio_model(num_workers=concurrency)
+    broker = create_broker("rabbitmq")
+    await broker.connect()
+    worker = InferenceWorker(broker, local_transcribe, concurrency)
+    await worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        logger.info(f"Inference worker processed {worker.processed} utterances in {worker.busy_seconds:.1f}s.")
+        worker.close()
+        await broker.close()
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import logging
+
+from src.inference.broker import create_broker
+from src.publishers.transcript_publisher import TRANSCRIPT_QUEUE, TRANSCRIPT_BROKER
+from src.store.transcript_store import TranscriptStore
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptConsumer:
+    """
+    Writes published transcript records into the transcript store.
+
+    Messages are acked after the write, and the store ignores message ids it has seen,
+    so redelivery after a crash does not duplicate lines.
+    """
+
+    def __init__(self, broker, store: TranscriptStore, prefetch=50):
+        self.broker = broker
+        self.store = store
+        self.prefetch = prefetch
+        self.stored = 0
+
+    async def start(self):
+        await self.broker.consume(TRANSCRIPT_QUEUE, self._on_message, prefetch=self.prefetch, durable=True)
+        logger.info(f"Transcript consumer writing {TRANSCRIPT_QUEUE} to {self.store.path}.")
+
+    async def _on_message(self, message):
+        record = json.loads(message.body)
+        record.setdefault("message_id", message.message_id)
+        # Await before adding, `self.stored += await ...` reads the counter before other messages finish.
+        added = await asyncio.to_thread(self.store.add_many, [record])
+        self.stored += added
+
+
+async def run_transcript_consumer():
+    """Entry point for `main.py --mode transcript-consumer`."""
+    broker = create_broker(TRANSCRIPT_BROKER)
+    await broker.connect()
+    store = TranscriptStore()
+    consumer = TranscriptConsumer(broker, store)
+    await consumer.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        logger.info(f"Transcript consumer stored {consumer.stored} records.")
+        await broker.close()
+        store.close()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+TRANSCRIPT_QUEUE = "volo.transcripts"
+# memory or rabbitmq, transcripts are only logged to file when unset.
+TRANSCRIPT_BROKER = os.getenv("TRANSCRIPT_BROKER")
+PUBLISH_BATCH_SIZE = int(os.getenv("PUBLISH_BATCH_SIZE", "50"))
+PUBLISH_FLUSH_SECONDS = float(os.getenv("PUBLISH_FLUSH_SECONDS", "1"))
+PUBLISH_RETRY_SECONDS = 10
+SPILL_FILE_PATH = os.getenv("SPILL_FILE_PATH", ".logs/spill/transcripts.jsonl")
+SPILL_MAX_BYTES = int(os.getenv("SPILL_MAX_BYTES", str(50 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+
+def message_id_for(record):
+    """The same utterance always maps to the same id, so duplicates are dropped by the store."""
+    key = f"{record.get('guild_id')}:{record.get('user_id')}:{record.get('date')} {record.get('begin')}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+class TranscriptPublisher:
+    """
+    Publishes transcript records to the broker in batches, off the voice thread.
+
+    `submit` only hands the record to the event loop, so sinks never wait on the network.
+    Batches are published with publisher confirms; when the broker is unreachable they are
+    appended to a bounded spill file on disk and replayed once publishing works again.
+
+    :param broker: Broker to publish to, see `src.inference.broker`.
+    :param loop: Event loop the publisher task runs on.
+    """
+
+    def __init__(
+        self,
+        broker,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        batch_size=PUBLISH_BATCH_SIZE,
+        flush_interval=PUBLISH_FLUSH_SECONDS,
+        spill_path=SPILL_FILE_PATH,
+        spill_max_bytes=SPILL_MAX_BYTES,
+        max_pending=10000,
+    ):
+        self.broker = broker
+        self.loop = loop
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.replay_path = spill_path + ".replay"
+        self.spill_max_bytes = spill_max_bytes
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.connected = False
+        self.last_connect_attempt = 0
+        self.task = None
+        self.current_batch = []
+        self.published = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    def submit(self, record):
+        """Thread safe, never blocks. Called by the sinks for every transcript record."""
+        record = dict(record)
+        record.setdefault("message_id", message_id_for(record))
+        self.loop.call_soon_threadsafe(self._enqueue, record)
+
+    def _enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self._spill([record])
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Publish or spill whatever is still queued."""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        # The batch in flight when cancelled may already be confirmed, the message ids make resending it harmless.
+        batch = self.current_batch
+        self.current_batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self._publish_or_spill(batch)
+        logger.info(
+            f"Transcript publisher closed: {self.published} published, {self.spilled} spilled, {self.dropped} dropped.")
+
+    async def _run(self):
+        # Records left on disk by an earlier run, or by a replay that close() cut short.
+        if self._has_spill() and await self._ensure_connected():
+            await self._replay_spill()
+        while True:
+            self.current_batch = await self._next_batch()
+            published = await self._publish_or_spill(self.current_batch)
+            self.current_batch = []
+            if published and self._has_spill():
+                await self._replay_spill()
+
+    def _has_spill(self):
+        return os.path.exists(self.replay_path) or os.path.exists(self.spill_path)
+
+    async def _next_batch(self):
+        batch = self.current_batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _ensure_connected(self):
+        if self.connected:
+            return True
+        if time.monotonic() - self.last_connect_attempt < PUBLISH_RETRY_SECONDS:
+            return False
+        self.last_connect_attempt = time.monotonic()
+        try:
+            await self.broker.connect()
+            self.connected = True
+        except Exception as e:
+            logger.warning(f"Transcript broker unreachable, spilling to disk: {e}")
+        return self.connected
+
+    async def _publish_or_spill(self, batch):
+        if await self._ensure_connected():
+            try:
+                await asyncio.gather(*(
+                    self.broker.publish(
+                        TRANSCRIPT_QUEUE,
+                        json.dumps(record).encode("utf-8"),
+                        message_id=record["message_id"],
+                        durable=True,
+                    )
+                    for record in batch
+                ))
+                self.published += len(batch)
+                return True
+            except Exception as e:
+                logger.warning(f"Publishing {len(batch)} transcripts failed, spilling to disk: {e}")
+        await asyncio.to_thread(self._spill, batch)
+        return False
+
+    def _spill(self, batch):
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        size = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+        with open(self.spill_path, "a", encoding="utf-8") as file:
+            for record in batch:
+                line = json.dumps(record) + "\n"
+                if size + len(line) > self.spill_max_bytes:
+                    self.dropped += 1
+                    continue
+                file.write(line)
+                size += len(line)
+                self.spilled += 1
+        if self.dropped:
+            logger.warning(f"Spill file is full, {self.dropped} transcripts dropped so far.")
+
+    async def _replay_spill(self):
+        """Publish the spill file in batches, streamed from disk. A replay file left by a cancelled replay goes first."""
+        if not os.path.exists(self.replay_path):
+            # Move the file aside first so records spilled during the replay are not lost.
+            os.replace(self.spill_path, self.replay_path)
+        replayed = 0
+        with open(self.replay_path, "r", encoding="utf-8") as file:
+            while True:
+                batch = await asyncio.to_thread(self._read_batch, file)
+                if not batch:
+                    break
+                if not await self._publish_or_spill(batch):
+                    await asyncio.to_thread(self._spill, (json.loads(line) for line in file if line.strip()))
+                    break
+                replayed += len(batch)
+        os.remove(self.replay_path)
+        logger.info(f"Replayed {replayed} spilled transcripts.")
+
+    def _read_batch(self, file):
+        batch = []
+        for line in file:
+            if line.strip():
+                batch.append(json.loads(line))
+                if len(batch) == self.batch_size:
+                    break
+        return batch
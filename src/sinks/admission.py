@@ -0,0 +1,49 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _id_set(value):
+    return {int(part) for part in (value or "").replace(" ", "").split(",") if part}
+
+
+# Comma separated discord ids whose audio is never transcribed.
+IGNORED_USER_IDS = _id_set(os.getenv("IGNORED_USER_IDS"))
+IGNORED_ROLE_IDS = _id_set(os.getenv("IGNORED_ROLE_IDS"))
+IGNORE_BOTS = os.getenv("IGNORE_BOTS", "true").lower() == "true"
+
+
+class AdmissionFilter:
+    """
+    Decides whether a user's audio is buffered at all, before it reaches the sink's queue.
+
+    Bot accounts (music and soundboard bots) and ignored users or roles are rejected. The decision
+    is cached per user once their member is known, so the packet path is a single dict lookup.
+    """
+
+    def __init__(self, ignored_users=None, ignored_roles=None, ignore_bots=IGNORE_BOTS):
+        self.ignored_users = IGNORED_USER_IDS if ignored_users is None else set(ignored_users)
+        self.ignored_roles = IGNORED_ROLE_IDS if ignored_roles is None else set(ignored_roles)
+        self.ignore_bots = ignore_bots
+        self.decisions = {}
+
+    def admits(self, user_id, guild=None):
+        decision = self.decisions.get(user_id, None)
+        if decision is not None:
+            return decision
+        if user_id in self.ignored_users:
+            decision = False
+        else:
+            member = guild.get_member(user_id) if guild else None
+            if member is None:
+                # Not cached yet, admit and ask again on the next packet.
+                return True
+            decision = not (
+                (self.ignore_bots and member.bot)
+                or any(role.id in self.ignored_roles for role in member.roles)
+            )
+        if not decision:
+            logger.info(f"Ignoring audio from {user_id}.")
+        self.decisions[user_id] = decision
+        return decision
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+FRAME_MS = 20
+GATE_THRESHOLD_DB = float(os.getenv("GATE_THRESHOLD_DB", "-45"))
+# Voiced frames needed to keep an utterance, shorter bursts are clicks and pops.
+GATE_MIN_VOICED_FRAMES = int(os.getenv("GATE_MIN_VOICED_FRAMES", "5"))
+GATE_PADDING_MS = 200
+
+
+def frame_energies(pcm: bytes, sample_rate: int, channels: int, frame_ms=FRAME_MS):
+    """
+    Loudness of every frame of 16 bit interleaved PCM in dBFS.
+
+    :return: Array with one value per complete frame.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = sample_rate * frame_ms // 1000 * channels
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(rms / 32768.0 + 1e-10)
+
+
+def trim_silence(
+    pcm: bytes,
+    sample_rate: int,
+    channels: int,
+    threshold_db=GATE_THRESHOLD_DB,
+    min_voiced_frames=GATE_MIN_VOICED_FRAMES,
+    padding_ms=GATE_PADDING_MS,
+):
+    """
+    Cut leading and trailing low energy audio, keeping some padding around the voiced part.
+
+    :return: The trimmed PCM, or None when the audio has too few voiced frames to be speech.
+    """
+    energies = frame_energies(pcm, sample_rate, channels)
+    voiced = np.flatnonzero(energies > threshold_db)
+    if voiced.size < min_voiced_frames:
+        return None
+
+    padding = padding_ms // FRAME_MS
+    frame_bytes = sample_rate * FRAME_MS // 1000 * channels * 2
+    start = max(voiced[0] - padding, 0) * frame_bytes
+    end = voiced[-1] + 1 + padding
+    # Keep the incomplete last frame when the voiced part runs to the end.
+    end = len(pcm) if end >= len(energies) else end * frame_bytes
+    return pcm[start:end]
+
+
+def pcm_seconds(pcm_length: int, sample_rate: int, channels: int):
+    return pcm_length / float(sample_rate * channels * 2)
@@ -0,0 +1,78 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+CROSSTALK_BIN_SECONDS = 0.1
+CROSSTALK_CORRELATION = float(os.getenv("CROSSTALK_CORRELATION", "0.85"))
+# Streams must overlap this long before they are compared, short overlaps correlate by chance.
+CROSSTALK_MIN_OVERLAP_SECONDS = 1.0
+CROSSTALK_HISTORY_SECONDS = 10
+
+
+def energy_envelope(chunks, times, bin_seconds=CROSSTALK_BIN_SECONDS):
+    """
+    Downsample a speaker's packets to a loudness envelope on a shared time grid.
+
+    :param chunks: 16 bit PCM packets as received from discord.
+    :param times: Arrival time of every packet, used to align streams of different users.
+    :return: Index of the first bin on the grid and the RMS level of every bin.
+    """
+    pairs = [(c, t) for c, t in zip(chunks, times) if len(c) >= 2]
+    if not pairs:
+        return 0, np.empty(0, dtype=np.float32)
+    sample_counts = np.fromiter((len(c) // 2 for c, _ in pairs), dtype=np.int64)
+    samples = np.concatenate([np.frombuffer(c[: n * 2], dtype=np.int16) for (c, _), n in zip(pairs, sample_counts)])
+    samples = samples.astype(np.float32)
+    offsets = np.concatenate(([0], np.cumsum(sample_counts)[:-1]))
+    rms = np.sqrt(np.add.reduceat(samples * samples, offsets) / sample_counts)
+
+    bins = np.floor(np.fromiter((t for _, t in pairs), dtype=np.float64) / bin_seconds).astype(np.int64)
+    start = int(bins.min())
+    envelope = np.zeros(int(bins.max()) - start + 1, dtype=np.float32)
+    np.maximum.at(envelope, bins - start, rms)
+    return start, envelope
+
+
+class CrossTalkDetector:
+    """
+    Finds utterances that are another user's voice bleeding into a mic in the same room.
+
+    An utterance is a bleed copy when its envelope closely follows a concurrent, louder stream.
+    Envelopes of committed utterances are kept for a few seconds so a copy that ends after
+    the original was already transcribed is still caught.
+    """
+
+    def __init__(self, threshold=CROSSTALK_CORRELATION, history_seconds=CROSSTALK_HISTORY_SECONDS):
+        self.threshold = threshold
+        self.history_seconds = history_seconds
+        self.min_overlap = int(CROSSTALK_MIN_OVERLAP_SECONDS / CROSSTALK_BIN_SECONDS)
+        self.recent = deque()
+
+    def remember(self, user, start, envelope):
+        now = time.time()
+        self.recent.append((user, start, envelope, now))
+        while self.recent and now - self.recent[0][3] > self.history_seconds:
+            self.recent.popleft()
+
+    def dominant_stream(self, user, start, envelope, concurrent):
+        """
+        :param concurrent: `(user, start, envelope)` of the other users' buffered utterances.
+        :return: The user whose stream this one is a copy of, or None.
+        """
+        others = list(concurrent) + [(u, s, e) for u, s, e, _ in self.recent]
+        for other_user, other_start, other in others:
+            if other_user == user:
+                continue
+            first = max(start, other_start)
+            last = min(start + len(envelope), other_start + len(other))
+            if last - first < self.min_overlap:
+                continue
+            a = envelope[first - start:last - start]
+            b = other[first - other_start:last - other_start]
+            if a.std() == 0 or b.std() == 0:
+                continue
+            if np.corrcoef(a, b)[0, 1] >= self.threshold and b.mean() > a.mean():
+                return other_user
+        return None
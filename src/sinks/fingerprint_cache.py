@@ -0,0 +1,64 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.sinks.audio_gate import FRAME_MS, frame_energies
+
+FINGERPRINT_CACHE_SIZE = int(os.getenv("FINGERPRINT_CACHE_SIZE", "256"))
+# reuse writes the cached transcription again, drop skips repeated clips entirely.
+FINGERPRINT_CACHE_ACTION = os.getenv("FINGERPRINT_CACHE_ACTION", "reuse")
+FINGERPRINT_BINS = 32
+
+
+def audio_fingerprint(pcm: bytes, sample_rate: int, channels: int):
+    """
+    Coarse fingerprint of a trimmed clip: its duration and a quantised loudness contour.
+
+    Replays of the same sound effect or song section hash to the same key even after
+    opus re-encoding, while speech practically never repeats exactly.
+
+    :return: Hex digest, or None for clips too short to fingerprint.
+    """
+    energies = frame_energies(pcm, sample_rate, channels)
+    if len(energies) < FINGERPRINT_BINS:
+        return None
+    edges = np.linspace(0, len(energies), FINGERPRINT_BINS + 1).astype(np.int64)
+    contour = np.add.reduceat(energies, edges[:-1]) / np.diff(edges)
+    quantised = np.clip(np.round((contour + 60) / 4), 0, 15).astype(np.uint8)
+    duration = len(energies) * FRAME_MS // 250
+    return hashlib.sha1(quantised.tobytes() + duration.to_bytes(4, "little")).hexdigest()
+
+
+class FingerprintCache:
+    """A small thread safe LRU of `(guild_id, fingerprint)` to transcription, shared by all sinks."""
+
+    def __init__(self, size=FINGERPRINT_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, transcription):
+        with self.lock:
+            self.entries[key] = transcription
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,94 @@
+import logging
+import os
+
+import yaml
+
+BASE_PROMPT = "You are writing the transcriptions for a D&D game."
+CAMPAIGN_GLOSSARY_FILE_PATH = os.getenv("CAMPAIGN_GLOSSARY_FILE_PATH")
+# Whisper only looks at the last 224 tokens of the prompt, roughly 4 characters per token.
+MAX_PROMPT_CHARS = 800
+MAX_HISTORY_CHARS = 240
+
+logger = logging.getLogger(__name__)
+
+
+def load_glossary(path):
+    """
+    Load campaign terms from a yaml list, a yaml mapping of lists or a plain text file with one term per line.
+
+    :param path: Path to the glossary file.
+    :return: List of terms, in file order.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read()
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError:
+        data = None
+    if isinstance(data, dict):
+        terms = [term for values in data.values() for term in (values or [])]
+    elif isinstance(data, list):
+        terms = data
+    else:
+        terms = content.splitlines()
+    return [str(term).strip() for term in terms if str(term).strip()]
+
+
+class PromptContext:
+    """
+    The whisper prompt for one guild, prepared once per session.
+
+    Names from the player_map and the campaign glossary are joined into a fixed vocabulary up front,
+    so each call only appends the speaker's last committed text. The language detected for a speaker
+    is remembered so detection only runs on their first utterance.
+    """
+
+    def __init__(self, player_map=None, glossary=None, base_prompt=BASE_PROMPT):
+        names = []
+        for user_map in (player_map or {}).values():
+            for key in ("character", "player"):
+                name = (user_map or {}).get(key)
+                if name and name not in names:
+                    names.append(str(name))
+        terms = [term for term in (glossary or []) if term not in names]
+
+        vocabulary = base_prompt
+        if names:
+            vocabulary += " Names: " + ", ".join(names) + "."
+        if terms:
+            vocabulary += " Terms: " + ", ".join(terms) + "."
+        limit = MAX_PROMPT_CHARS - MAX_HISTORY_CHARS
+        if len(vocabulary) > limit:
+            vocabulary = vocabulary[:limit]
+            # Drop the name or term that was cut in half, keep a sentence's closing period.
+            end = max(vocabulary.rfind(", "), vocabulary.rfind(". ") + 1)
+            if end > 0:
+                vocabulary = vocabulary[:end]
+        self.vocabulary = vocabulary
+        self.last_text = {}
+        self.languages = {}
+
+    @classmethod
+    def for_session(cls, player_map):
+        return cls(player_map, load_glossary(CAMPAIGN_GLOSSARY_FILE_PATH))
+
+    def prompt_for(self, user_id):
+        history = self.last_text.get(user_id)
+        if not history:
+            return self.vocabulary
+        return f"{self.vocabulary} {history}"
+
+    def commit(self, user_id, text):
+        text = (text or "").strip()
+        if text:
+            self.last_text[user_id] = text[-MAX_HISTORY_CHARS:]
+
+    def language_for(self, user_id, default=None):
+        return self.languages.get(user_id, default)
+
+    def set_language(self, user_id, language):
+        if language and user_id not in self.languages:
+            logger.debug(f"Detected language {language} for {user_id}.")
+            self.languages[user_id] = language
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+
+# Restarts allowed per guild within the window before the pipeline is given up on.
+RESTART_BUDGET = int(os.getenv("RESTART_BUDGET", "5"))
+RESTART_WINDOW_SECONDS = 600
+RESTART_BACKOFF_SECONDS = 1.0
+RESTART_MAX_BACKOFF_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class SinkSupervisor:
+    """
+    Restarts a guild's voice pipeline when its thread crashes, keeping the buffered audio.
+
+    Every sink reports to its own handler, restarts back off exponentially and a guild that
+    crashes more than RESTART_BUDGET times within RESTART_WINDOW_SECONDS is given up on.
+
+    :param loop: Event loop restarts are scheduled on.
+    :param on_give_up: Called with the guild id when its restart budget is used up.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, on_give_up=None):
+        self.loop = loop
+        self.on_give_up = on_give_up
+        self.sinks = {}
+        self.restart_times = defaultdict(deque)
+        self.restart_counts = defaultdict(int)
+        self.lost_audio_seconds = defaultdict(float)
+
+    def watch(self, guild_id, sink):
+        self.sinks[guild_id] = sink
+        sink.start_voice_thread(on_exception=lambda e: self._on_crash(guild_id, sink, e))
+
+    def forget(self, guild_id):
+        self.sinks.pop(guild_id, None)
+
+    def _on_crash(self, guild_id, sink, e):
+        # Runs on the crashed voice thread, hand over to the event loop.
+        self.loop.call_soon_threadsafe(self._schedule_restart, guild_id, sink, e)
+
+    def _schedule_restart(self, guild_id, sink, e):
+        if self.sinks.get(guild_id) is not sink:
+            return
+        now = time.monotonic()
+        history = self.restart_times[guild_id]
+        while history and now - history[0] > RESTART_WINDOW_SECONDS:
+            history.popleft()
+
+        if len(history) >= RESTART_BUDGET:
+            lost = sink.discard_buffered_audio()
+            self.lost_audio_seconds[guild_id] += lost
+            logger.error(
+                f"Voice pipeline for guild {guild_id} crashed {len(history) + 1} times within "
+                f"{RESTART_WINDOW_SECONDS}s, giving up. {lost:.1f}s of audio lost.\n{e}")
+            self.forget(guild_id)
+            if self.on_give_up:
+                self.on_give_up(guild_id)
+            return
+
+        delay = min(RESTART_BACKOFF_SECONDS * 2 ** len(history), RESTART_MAX_BACKOFF_SECONDS)
+        history.append(now)
+        logger.warning(f"Voice pipeline for guild {guild_id} crashed, restarting in {delay:.0f}s.\n{e}")
+        self.loop.call_later(delay, self._restart, guild_id, sink)
+
+    def _restart(self, guild_id, sink):
+        # The session may have been stopped during the backoff.
+        if self.sinks.get(guild_id) is not sink or sink.draining:
+            return
+        sink.restart_voice_thread()
+        self.restart_counts[guild_id] += 1
+        logger.info(
+            f"Restarted voice pipeline for guild {guild_id}: {self.restart_counts[guild_id]} restarts, "
+            f"{self.lost_audio_seconds[guild_id]:.1f}s of audio lost so far.")
+
+    def report(self):
+        return {
+            guild_id: {
+                "restarts": self.restart_counts[guild_id],
+                "lost_audio_seconds": self.lost_audio_seconds[guild_id],
+            }
+            for guild_id in set(self.restart_counts) | set(self.lost_audio_seconds)
+        }
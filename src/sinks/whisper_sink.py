@@ -2,37 +2,134 @@ import asyncio
 import io
 import json
 import logging
+import os
 import threading
 import time
 import wave
-from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from queue import Queue
+from statistics import median
 from typing import List
 
-import speech_recognition as sr
-import torch
 from discord.sinks.core import Filters, Sink, default_filters
-from faster_whisper import WhisperModel
-from openai import OpenAI
+
+from src.sinks.admission import AdmissionFilter
+from src.sinks.audio_gate import pcm_seconds, trim_silence
+from src.sinks.crosstalk import CrossTalkDetector, energy_envelope
+from src.sinks.fingerprint_cache import FINGERPRINT_CACHE_ACTION, FingerprintCache, audio_fingerprint
+from src.sinks.prompt_context import PromptContext
 
 WHISPER_MODEL = "large-v3"
-WHISPER_LANGUAGE = "en"
+# Set WHISPER_LANGUAGE=auto to detect the language once per speaker.
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "10"))
 WHISPER__PRECISION = "float32"
+# Transcriptions the model runs at once. With the default of 1 concurrent calls queue up inside
+# faster-whisper, inference workers raise it to their --workers concurrency.
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+# Smaller model used to finish off utterances that miss the drain deadline on /stop.
+WHISPER_FALLBACK_MODEL = os.getenv("WHISPER_FALLBACK_MODEL")
+DRAIN_TIMEOUT_SECONDS = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "10"))
+DRAIN_FALLBACK_GRACE_SECONDS = float(os.getenv("DRAIN_FALLBACK_GRACE_SECONDS", "5"))
+# Silence after which a speaker's utterance is committed.
+SILENCE_COMMIT_SECONDS = 1.5
+# Speculative mode starts inference after a short pause and commits it if the speaker stays silent.
+SPECULATIVE_TRANSCRIPTION = os.getenv("SPECULATIVE_TRANSCRIPTION", "false").lower() == "true"
+SPECULATIVE_PAUSE_SECONDS = float(os.getenv("SPECULATIVE_PAUSE_SECONDS", "0.4"))
+# Speculative jobs allowed at once across all sinks. The model gets this many extra workers for them,
+# so a running or discarded speculation never holds the slot a committed utterance is waiting for.
+SPECULATIVE_BUDGET = int(os.getenv("SPECULATIVE_BUDGET", "2"))
+# Skip inference on utterances that are another user's voice picked up by a second mic in the room.
+CROSSTALK_DEDUP = os.getenv("CROSSTALK_DEDUP", "false").lower() == "true"
+# Utterances shorter than this after trimming wait to be merged into the speaker's next one.
+MIN_FRAGMENT_SECONDS = float(os.getenv("MIN_FRAGMENT_SECONDS", "0.6"))
+MERGE_GAP_SECONDS = float(os.getenv("MERGE_GAP_SECONDS", "3"))
 
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-
-# Set the model to evaluation mode (important for inference)
 logger = logging.getLogger(__name__)
 
-if DEVICE == "cuda":
+# torch and faster-whisper are only imported once a model is needed, see get_audio_model.
+audio_model = None
+fallback_audio_model = None
+model_lock = threading.Lock()
+
+speculative_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_BUDGET)
+# One bounded LRU for all sinks, keyed by guild so a transcription is never reused in another server.
+fingerprint_cache = FingerprintCache()
+speculative_slots = threading.BoundedSemaphore(SPECULATIVE_BUDGET)
+
+
+def _whisper_device():
+    import torch
+
+    if not torch.cuda.is_available():
+        return "cpu"
     gpu_ram = torch.cuda.get_device_properties(0).total_memory/1024**3
     if gpu_ram < 5.0:
         logger.warning("GPU has less than 5GB of RAM. Switching to CPU.")
-        DEVICE = "cpu"
+        return "cpu"
+    return "cuda"
 
-audio_model = WhisperModel(WHISPER_MODEL, device=DEVICE, compute_type=WHISPER__PRECISION)
 
+def get_audio_model(fallback=False, num_workers=None):
+    """
+    Load the whisper model on first use, so processes that never transcribe locally skip it.
+
+    :param fallback: Return the WHISPER_FALLBACK_MODEL instead, None when it is not configured.
+    :param num_workers: Concurrent transcriptions the model is built for. By default WHISPER_NUM_WORKERS,
+        plus SPECULATIVE_BUDGET slots of its own for speculative jobs. Only the call that loads the model decides it.
+    """
+    global audio_model, fallback_audio_model
+    with model_lock:
+        if fallback and not WHISPER_FALLBACK_MODEL:
+            return None
+        if (fallback_audio_model if fallback else audio_model) is None:
+            from faster_whisper import WhisperModel
+
+            device = _whisper_device()
+            if num_workers is None:
+                num_workers = WHISPER_NUM_WORKERS
+                if SPECULATIVE_TRANSCRIPTION and not fallback:
+                    num_workers += SPECULATIVE_BUDGET
+            num_workers = max(num_workers, 1)
+            if fallback:
+                fallback_audio_model = WhisperModel(
+                    WHISPER_FALLBACK_MODEL, device=device, compute_type=WHISPER__PRECISION, num_workers=num_workers)
+            else:
+                audio_model = WhisperModel(
+                    WHISPER_MODEL, device=device, compute_type=WHISPER__PRECISION, num_workers=num_workers)
+            logger.info(
+                f"Loaded whisper model {WHISPER_FALLBACK_MODEL if fallback else WHISPER_MODEL} on {device} "
+                f"with {num_workers} workers.")
+        return fallback_audio_model if fallback else audio_model
+
+
+def local_transcribe(temp_file, prompt=None, language=None, model=None):
+    """
+    Transcribe a wav file with the in-process whisper model.
+
+    :return: The transcribed text and the language whisper decoded it as.
+    """
+    temp_file.seek(0)
+    segments, info = (model or get_audio_model()).transcribe(
+        temp_file,
+        language=language,
+        beam_size=WHISPER_BEAM_SIZE,
+        best_of=3,
+        vad_filter=True,
+        vad_parameters=dict(
+            min_silence_duration_ms=150,
+            threshold=0.8
+        ),
+        no_speech_threshold=0.6,
+        initial_prompt=prompt,
+    )
+
+    result = ""
+    for segment in segments:
+        result += segment.text
+    return result, info.language
 
 
 class Speaker:
@@ -45,9 +142,12 @@ class Speaker:
         self.player = player
         self.character = character
         self.data = [data]
+        self.times = [time]
         self.first_word =time
         self.last_word = time
         self.new_bytes = 1
+        self.speculative_future = None
+        self.fingerprint = None
 
 
 class WhisperSink(Sink):
@@ -70,6 +170,9 @@ class WhisperSink(Sink):
         *,
         filters=None,
         player_map={},
+        prompt_context=None,
+        inference_client=None,
+        transcript_subscribers=(),
         data_length=50000,
         max_speakers=-1,
     ):
@@ -85,39 +188,107 @@ class WhisperSink(Sink):
         self.max_speakers = max_speakers
         self.transcriber_type = transcriber_type
         if transcriber_type == "openai":
+            from openai import OpenAI
+
             self.client = OpenAI()
         self.vc = None
         self.audio_data = {}
         self.running = True
+        self.draining = False
         self.speakers: List[Speaker] = []
         self.voice_queue = Queue()
+        # Futures the voice thread is waiting on, drain takes them over together with the buffered speakers.
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
         self.executor = ThreadPoolExecutor(max_workers=8)  # TODO: Adjust this
+        if transcriber_type == "local":
+            # Warm the models up in the background instead of on the first utterance.
+            self.executor.submit(get_audio_model)
+            self.executor.submit(get_audio_model, True)
         self.player_map = player_map
+        self.pending_fragments = {}
+        self.metrics = defaultdict(float)
+        self.first_text_latencies = deque(maxlen=1000)
+        self.crosstalk = CrossTalkDetector() if CROSSTALK_DEDUP else None
+        self.admission = AdmissionFilter()
+        if prompt_context is None:
+            prompt_context = PromptContext(player_map)
+        self.prompt_context = prompt_context
+        self.inference_client = inference_client
+        # Receive every transcript record, their submit() must not block the voice thread.
+        self.transcript_subscribers = list(transcript_subscribers)
 
     def start_voice_thread(self, on_exception=None):
-        def thread_exception_hook(args):
+        def thread_exception_hook(e):
             logger.debug(
-                f"""Exception in voice thread: {args} Likely disconnected while listening."""
+                f"""Exception in voice thread: {e} Likely disconnected while listening."""
             )
 
         logger.debug(
             f"Starting whisper sink thread for guild {self.vc.channel.guild.id}."
         )
+        # Exceptions are routed to this sink's handler only, not through the process wide threading.excepthook.
+        self.on_exception = on_exception or thread_exception_hook
         self.voice_thread = threading.Thread(
-            target=self.insert_voice, args=(), daemon=True
+            target=self._run_voice_thread, args=(), daemon=True
         )
-
-        if on_exception:
-            threading.excepthook = on_exception
-        else:
-            threading.excepthook = thread_exception_hook
-
         self.voice_thread.start()
 
-    def stop_voice_thread(self):
+    def _run_voice_thread(self):
+        try:
+            self.insert_voice()
+        except Exception as e:
+            self.on_exception(e)
+
+    def restart_voice_thread(self):
+        """
+        Start a replacement voice thread after a crash, handing it the buffered state.
+
+        Speakers, held fragments and queued packets stay where they are. Utterances whose
+        transcription was in flight are queued again, on a fresh executor.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        with self.in_flight_lock:
+            self.in_flight.clear()
+        for speaker in self.speakers:
+            self._discard_speculation(speaker)
+            if speaker.new_bytes == 0:
+                speaker.new_bytes = 2
+        self.metrics["restarts"] += 1
+        self.running = True
+        self.start_voice_thread(self.on_exception)
+
+    def memory_stats(self):
+        """Buffered audio, queue depths and the fingerprint cache hit rate, read without locking so the numbers are approximate."""
+        speakers = list(self.speakers)
+        fragments = list(self.pending_fragments.values())
+        return {
+            "buffered_bytes": sum(len(chunk) for s in speakers + fragments for chunk in s.data),
+            "speakers": len(speakers),
+            "pending_fragments": len(fragments),
+            "voice_queue": self.voice_queue.qsize(),
+            "executor_queue": self.executor._work_queue.qsize(),
+            "output_queue": self.transcription_output_queue.qsize(),
+            "fingerprint_hit_rate": round(fingerprint_cache.hit_rate, 3),
+        }
+
+    def discard_buffered_audio(self):
+        """Drop everything buffered when the pipeline is given up on, returns the seconds of audio lost."""
+        chunks = [chunk for s in self.speakers for chunk in s.data]
+        chunks += [chunk for s in self.pending_fragments.values() for chunk in s.data]
+        while not self.voice_queue.empty():
+            chunks.append(self.voice_queue.get()[1])
+        self.speakers.clear()
+        self.pending_fragments.clear()
+        lost = pcm_seconds(sum(len(chunk) for chunk in chunks), self.vc.decoder.SAMPLING_RATE, self.vc.decoder.CHANNELS)
+        self.metrics["lost_audio_seconds"] += lost
+        return lost
+
+    def stop_voice_thread(self, timeout=None):
         self.running = False
         try:
-            self.voice_thread.join()
+            self.voice_thread.join(timeout)
         except Exception as e:
             logger.error(f"Unexpected error during thread join: {e}")
         finally:
@@ -134,42 +305,43 @@ class WhisperSink(Sink):
             frame_rate = wave_file.getframerate()
             duration = frames / float(frame_rate)
         return duration
-    def transcribe_audio(self, temp_file):
+    def transcribe_audio(self, temp_file, model=None, user=None):
         try:
             # Ensure that the audio is long enough to transcribe. If not, return an empty string
             if self.check_audio_length(temp_file) <= 0.1:
                 return ""
-            
+
+            prompt = self.prompt_context.prompt_for(user)
+            language = WHISPER_LANGUAGE
+            if language == "auto":
+                language = self.prompt_context.language_for(user)
+
             if self.transcriber_type == "openai":
                 temp_file.seek(0)
                 openai_transcription = self.client.audio.transcriptions.create(
                     file=("foobar.wav", temp_file),
                     model="whisper-1",
-                    language=WHISPER_LANGUAGE,
+                    prompt=prompt,
+                    **({"language": language} if language else {}),
                 )
                 logger.info(f"OpenAI Transcription: {openai_transcription.text}")
                 return openai_transcription.text
-            else:               
-                # The whisper model
-                temp_file.seek(0)
-                segments, info = audio_model.transcribe(
-                    temp_file,
-                    language=WHISPER_LANGUAGE,
-                    beam_size=10,
-                    best_of=3,
-                    vad_filter=True,
-                    vad_parameters=dict(
-                        min_silence_duration_ms=150,
-                        threshold=0.8
-                    ),
-                    no_speech_threshold=0.6,
-                    initial_prompt="You are writing the transcriptions for a D&D game.",
+            elif self.transcriber_type == "remote":
+                future = asyncio.run_coroutine_threadsafe(
+                    self.inference_client.transcribe(
+                        temp_file.getvalue(), prompt, language, guild_id=self.vc.channel.guild.id),
+                    self.loop,
                 )
-
-                segments = list(segments)
-                result = ""
-                for segment in segments:
-                    result += segment.text
+                response = future.result(timeout=self.inference_client.timeout)
+                if language is None:
+                    self.prompt_context.set_language(user, response.get("language"))
+                logger.info(f"Remote Transcription: {response['text']}")
+                return response["text"]
+            else:
+                # The whisper model
+                result, detected_language = local_transcribe(temp_file, prompt, language, model=model)
+                if language is None:
+                    self.prompt_context.set_language(user, detected_language)
 
                 logger.info(f"Transcription: {result}")
                 return result
@@ -177,7 +349,9 @@ class WhisperSink(Sink):
             logger.error(f"Error transcribing audio: {e}")
             return ""
 
-    def transcribe(self, speaker: Speaker):
+    def transcribe(self, speaker: Speaker, model=None):
+        import speech_recognition as sr
+
         audio_data = sr.AudioData(
             bytes().join(speaker.data),
             self.vc.decoder.SAMPLING_RATE,
@@ -197,7 +371,7 @@ class WhisperSink(Sink):
         wav_io.seek(0)
         # Check if the audio is long enough to transcribe, else return empty string
         
-        transcription = self.transcribe_audio(wav_io)
+        transcription = self.transcribe_audio(wav_io, model=model, user=speaker.user)
 
         return transcription
     
@@ -229,63 +403,295 @@ class WhisperSink(Sink):
 
         return transcriptions
     
+    def _absorb_voice_queue(self):
+        """Move queued packets from discord into the matching speaker buffers."""
+        while not self.voice_queue.empty():
+            item = self.voice_queue.get()
+            # Find or create a speaker
+            speaker = next(
+                (s for s in self.speakers if s.user == item[0]), None
+            )
+            if speaker:
+                if speaker.speculative_future:
+                    # The speaker resumed, the speculative result no longer covers the utterance.
+                    self._discard_speculation(speaker)
+                speaker.data.append(item[1])
+                speaker.times.append(item[2])
+                speaker.new_bytes += 1
+                speaker.last_word = item[2]
+            elif (
+                self.max_speakers < 0 or len(self.speakers) <= self.max_speakers
+            ):
+                user_id = item[0]
+                user_map = self.player_map.get(user_id, {})
+                player = user_map.get("player")
+                character = user_map.get("character")
+                self.speakers.append(Speaker(user_id, player, character, item[1], item[2]))
+
     def insert_voice(self):
         while self.running:
             try:
-                # Process the voice_queue
-                while not self.voice_queue.empty():
-                    item = self.voice_queue.get()
-                    # Find or create a speaker
-                    speaker = next(
-                        (s for s in self.speakers if s.user == item[0]), None
-                    )
-                    if speaker:
-                        speaker.data.append(item[1])
-                        speaker.new_bytes += 1
-                        speaker.last_word = item[2]
-                    elif (
-                        self.max_speakers < 0 or len(self.speakers) <= self.max_speakers
-                    ):
-                        user_id = item[0]
-                        user_map = self.player_map.get(user_id, {})
-                        player = user_map.get("player")
-                        character = user_map.get("character")
-                        self.speakers.append(Speaker(user_id, player, character, item[1], item[2]))
-                    
-                    
-
-
-                # Transcribe audio for each speaker
-                # so this is interesting, as we arent checking the size of the audio stream, we are just transcribing it
-                future_to_speaker = {}
-                for speaker in self.speakers:
-                    if (time.time() - speaker.last_word) < 1.5:
-                        # Lets make sure the user stopped talking.
-                        continue
-                    if speaker.new_bytes > 1:
-                        speaker.new_bytes = 0
-                        future = self.executor.submit(self.transcribe, speaker)
-                        future_to_speaker[future] = speaker
-                    else:
-                        continue
-                
+                # Buffered state only changes under the lock, so drain can take it over at any point.
+                with self.in_flight_lock:
+                    if not self.running:
+                        break
+                    # Process the voice_queue
+                    self._absorb_voice_queue()
+
+                    # Transcribe audio for each speaker
+                    # so this is interesting, as we arent checking the size of the audio stream, we are just transcribing it
+                    future_to_speaker = {}
+                    for speaker in self.speakers[:]:
+                        silence = time.time() - speaker.last_word
+                        if silence < SILENCE_COMMIT_SECONDS:
+                            # Lets make sure the user stopped talking.
+                            if SPECULATIVE_TRANSCRIPTION and silence >= SPECULATIVE_PAUSE_SECONDS:
+                                self._speculate(speaker)
+                            continue
+                        if speaker.new_bytes > 1:
+                            speaker.new_bytes = 0
+                            if self.crosstalk and self._is_crosstalk(speaker):
+                                self._discard_speculation(speaker)
+                                self.speakers.remove(speaker)
+                                continue
+                            if not self._gate_for_dispatch(speaker) or self._is_repeated_clip(speaker):
+                                self._discard_speculation(speaker)
+                                self.speakers.remove(speaker)
+                                continue
+                            if speaker.speculative_future:
+                                # Nothing was said since the speculative job started, commit its result.
+                                self.metrics["speculative_committed"] += 1
+                                future_to_speaker[speaker.speculative_future] = speaker
+                                continue
+                            future = self.executor.submit(self.transcribe, speaker)
+                            future_to_speaker[future] = speaker
+                        else:
+                            continue
+
+                    for fragment in self._expired_fragments():
+                        future = self.executor.submit(self.transcribe, fragment)
+                        future_to_speaker[future] = fragment
+
+                    self.in_flight.update(future_to_speaker)
                 for future in future_to_speaker:
-                    speaker = future_to_speaker[future]
                     try:
                         transcription = future.result()
-                        current_time = time.time()
-                        speaker_new_bytes = speaker.new_bytes
-                        # Remove speaker once returned. 
-                        for s in self.speakers[:]:
-                            if speaker.user == s.user:
-                                self.write_transcription_log(s, transcription)
-                                self.speakers.remove(s)
-
                     except Exception as e:
-                        logger.warn(f"Error in insert_voice future: {e}")
+                        transcription = None
+                        if not self.draining:
+                            logger.warn(f"Error in insert_voice future: {e}")
+                    with self.in_flight_lock:
+                        speaker = self.in_flight.pop(future, None)
+                        if speaker is None or transcription is None:
+                            # Drain took the utterance over, or it failed.
+                            continue
+                        # Remove speaker once returned.
+                        self.write_transcription_log(speaker, transcription)
+                        if speaker.fingerprint and transcription.strip():
+                            fingerprint_cache.put((self.vc.channel.guild.id, speaker.fingerprint), transcription)
+                        self.first_text_latencies.append(time.time() - speaker.last_word)
+                        if speaker in self.speakers:
+                            self.speakers.remove(speaker)
 
             except Exception as e:
                 logger.error(f"Error in insert_voice: {e}")
+                # Leave it to the sink's supervisor to restart the thread.
+                raise
+
+    def _gate_for_dispatch(self, speaker: Speaker, flushing=False):
+        """
+        Trim the silence around a finished utterance before it is sent to inference.
+
+        Utterances without enough voiced frames are dropped. Very short ones are held back
+        and merged into the same user's next utterance, unless the sink is flushing.
+
+        :return: True when the speaker should be transcribed.
+        """
+        sample_rate = self.vc.decoder.SAMPLING_RATE
+        channels = self.vc.decoder.CHANNELS
+        pcm = bytes().join(speaker.data)
+        duration = pcm_seconds(len(pcm), sample_rate, channels)
+        trimmed = trim_silence(pcm, sample_rate, channels)
+        if trimmed is None:
+            self.metrics["gate_dropped_utterances"] += 1
+            self.metrics["inference_seconds_saved"] += duration
+            return False
+        self.metrics["inference_seconds_saved"] += duration - pcm_seconds(len(trimmed), sample_rate, channels)
+
+        fragment = self.pending_fragments.pop(speaker.user, None)
+        if fragment is not None:
+            trimmed = bytes().join(fragment.data) + trimmed
+            speaker.first_word = fragment.first_word
+            self.metrics["gate_merged_fragments"] += 1
+        speaker.data = [trimmed]
+
+        if not flushing and pcm_seconds(len(trimmed), sample_rate, channels) < MIN_FRAGMENT_SECONDS:
+            self.pending_fragments[speaker.user] = speaker
+            return False
+        return True
+
+    def _is_crosstalk(self, speaker: Speaker):
+        """Check whether a finished utterance is bleed from a louder concurrent stream, and remember it if not."""
+        start, envelope = energy_envelope(speaker.data, speaker.times)
+        concurrent = [
+            (s.user, *energy_envelope(s.data, s.times))
+            for s in self.speakers
+            if s is not speaker and s.last_word >= speaker.first_word and s.first_word <= speaker.last_word
+        ]
+        dominant = self.crosstalk.dominant_stream(speaker.user, start, envelope, concurrent)
+        if dominant is None:
+            self.crosstalk.remember(speaker.user, start, envelope)
+            return False
+        logger.debug(f"Skipping utterance of {speaker.user}, it is bleed from {dominant}.")
+        self.metrics["crosstalk_skipped_utterances"] += 1
+        self.metrics["crosstalk_skipped_seconds"] += pcm_seconds(
+            sum(len(chunk) for chunk in speaker.data), self.vc.decoder.SAMPLING_RATE, self.vc.decoder.CHANNELS)
+        return True
+
+    def _is_repeated_clip(self, speaker: Speaker):
+        """
+        Look the gated utterance up in the fingerprint cache.
+
+        A hit is written with the earlier transcription (or dropped, see FINGERPRINT_CACHE_ACTION)
+        instead of being transcribed again.
+        """
+        sample_rate = self.vc.decoder.SAMPLING_RATE
+        channels = self.vc.decoder.CHANNELS
+        speaker.fingerprint = audio_fingerprint(speaker.data[0], sample_rate, channels)
+        if speaker.fingerprint is None:
+            return False
+        transcription = fingerprint_cache.get((self.vc.channel.guild.id, speaker.fingerprint))
+        if transcription is None:
+            self.metrics["fingerprint_misses"] += 1
+            return False
+        self.metrics["fingerprint_hits"] += 1
+        self.metrics["inference_seconds_saved"] += pcm_seconds(len(speaker.data[0]), sample_rate, channels)
+        if FINGERPRINT_CACHE_ACTION == "reuse":
+            self.write_transcription_log(speaker, transcription)
+        return True
+
+    def _speculate(self, speaker: Speaker):
+        """
+        Start low priority inference on a paused speaker's audio, if the global budget allows it.
+
+        Only utterances the gate would send as they are get speculated on, so the result
+        can be committed unchanged when the speaker stays silent.
+        """
+        if speaker.speculative_future or speaker.new_bytes <= 1 or speaker.user in self.pending_fragments:
+            return
+        sample_rate = self.vc.decoder.SAMPLING_RATE
+        channels = self.vc.decoder.CHANNELS
+        trimmed = trim_silence(bytes().join(speaker.data), sample_rate, channels)
+        if trimmed is None or pcm_seconds(len(trimmed), sample_rate, channels) < MIN_FRAGMENT_SECONDS:
+            return
+        if not speculative_slots.acquire(blocking=False):
+            self.metrics["speculative_skipped_budget"] += 1
+            return
+        snapshot = Speaker(speaker.user, speaker.player, speaker.character, trimmed, speaker.first_word)
+        future = speculative_executor.submit(self.transcribe, snapshot)
+        future.add_done_callback(lambda _: speculative_slots.release())
+        speaker.speculative_future = future
+        self.metrics["speculative_started"] += 1
+
+    def _discard_speculation(self, speaker: Speaker):
+        if speaker.speculative_future is None:
+            return
+        speaker.speculative_future.cancel()
+        speaker.speculative_future = None
+        self.metrics["speculative_discarded"] += 1
+
+    def _expired_fragments(self):
+        """Pop held fragments whose speaker did not start talking again within MERGE_GAP_SECONDS."""
+        expired = []
+        for user, fragment in list(self.pending_fragments.items()):
+            resumed = any(
+                s.user == user and s.first_word - fragment.last_word <= MERGE_GAP_SECONDS
+                for s in self.speakers
+            )
+            if not resumed and time.time() - fragment.last_word > MERGE_GAP_SECONDS:
+                expired.append(self.pending_fragments.pop(user))
+        return expired
+
+    def drain(self, timeout=DRAIN_TIMEOUT_SECONDS):
+        """
+        Flush every buffered speaker before the sink is closed.
+
+        Stops the voice thread and takes over the inference it is still waiting on, then
+        transcribes whatever is still buffered regardless of the silence window and waits up
+        to `timeout` seconds for all of it. Utterances that miss the deadline are retried on
+        the fallback model when one is configured, otherwise they are counted as lost.
+
+        :return: A dict with the drain latency and utterance counts.
+        """
+        started = time.time()
+        deadline = started + timeout
+        self.draining = True
+
+        # The voice thread checks this under the lock, it dispatches nothing after the takeover.
+        self.running = False
+        with self.in_flight_lock:
+            future_to_speaker, self.in_flight = self.in_flight, {}
+            taken_over = set(future_to_speaker.values())
+            self._absorb_voice_queue()
+
+            for speaker in self.speakers[:]:
+                if speaker in taken_over:
+                    continue
+                self._discard_speculation(speaker)
+                if speaker.new_bytes > 0 and self._gate_for_dispatch(speaker, flushing=True):
+                    speaker.new_bytes = 0
+                    future = self.executor.submit(self.transcribe, speaker)
+                    future_to_speaker[future] = speaker
+                else:
+                    self.speakers.remove(speaker)
+            for fragment in self.pending_fragments.values():
+                future = self.executor.submit(self.transcribe, fragment)
+                future_to_speaker[future] = fragment
+            self.pending_fragments.clear()
+        if taken_over:
+            logger.debug(f"Took over {len(taken_over)} utterances from the voice thread.")
+
+        done, not_done = wait(future_to_speaker, timeout=max(deadline - time.time(), 0))
+        for future in done:
+            speaker = future_to_speaker[future]
+            try:
+                self.write_transcription_log(speaker, future.result())
+            except Exception as e:
+                logger.warning(f"Error in drain future: {e}")
+            if speaker in self.speakers:
+                self.speakers.remove(speaker)
+
+        late = []
+        for future in not_done:
+            future.cancel()
+            late.append(future_to_speaker[future])
+
+        lost = 0
+        fallback_deadline = time.time() + DRAIN_FALLBACK_GRACE_SECONDS
+        fallback_model = get_audio_model(fallback=True) if late and self.transcriber_type == "local" else None
+        for speaker in late:
+            if fallback_model is None or time.time() > fallback_deadline:
+                lost += 1
+                continue
+            try:
+                self.write_transcription_log(speaker, self.transcribe(speaker, model=fallback_model))
+            except Exception as e:
+                lost += 1
+                logger.warning(f"Error transcribing {speaker.user} with the fallback model: {e}")
+        self.speakers.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        summary = {
+            "flushed": len(done),
+            "fallback": len(late) - lost,
+            "lost": lost,
+            "latency": time.time() - started,
+        }
+        logger.info(
+            f"Drained whisper sink in {summary['latency']:.2f}s: {summary['flushed']} flushed, "
+            f"{summary['fallback']} via fallback, {summary['lost']} lost."
+        )
+        return summary
 
     def check_speaker_timeouts(self, current_speaker, transcription):
 
@@ -308,9 +714,12 @@ class WhisperSink(Sink):
             "player": speaker.player,
             "character": speaker.character,
             "event_source": "Discord",                     # Event source
+            "guild_id": self.vc.channel.guild.id if self.vc else None,
             "data": transcription                          # Transcription text
         }
 
+        self.prompt_context.commit(speaker.user, transcription)
+
         # Convert the log data to JSON
         log_message = json.dumps(log_data)
 
@@ -320,6 +729,11 @@ class WhisperSink(Sink):
         transcription_logger.info(log_message)
         # Place into queue for processing
         self.transcription_output_queue.put_nowait(log_message)
+        for subscriber in self.transcript_subscribers:
+            try:
+                subscriber.submit(log_data)
+            except Exception as e:
+                logger.error(f"Error submitting transcript to {type(subscriber).__name__}: {e}")
     
 
     @Filters.container
@@ -327,6 +741,11 @@ class WhisperSink(Sink):
         """Gets audio data from discord for each user talking"""
         # Discord will send empty bytes from when the user stopped talking to when the user starts to talk again.
         # Its only the first data that grows massive and its only silent audio, so its trimmed.
+        if self.draining:
+            return
+        if not self.admission.admits(user, self.vc.channel.guild if self.vc else None):
+            self.metrics["admission_rejected_packets"] += 1
+            return
 
         data_len = len(data)
         if data_len > self.data_length:
@@ -337,6 +756,10 @@ class WhisperSink(Sink):
 
     def close(self):
         logger.debug("Closing whisper sink.")
+        logger.info(f"Whisper sink metrics: {dict(self.metrics)}")
+        logger.info(f"Fingerprint cache hit rate: {fingerprint_cache.hit_rate:.1%}")
+        if self.first_text_latencies:
+            logger.info(f"Median first text latency: {median(self.first_text_latencies):.2f}s")
         self.running = False
         self.queue.put_nowait(None)
         super().cleanup()
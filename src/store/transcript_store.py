@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+TRANSCRIPT_STORE_PATH = os.getenv("TRANSCRIPT_STORE_PATH", ".logs/transcripts.sqlite3")
+
+logger = logging.getLogger(__name__)
+
+
+def iter_store_records(path=TRANSCRIPT_STORE_PATH, guild_id=None, date=None):
+    """Yield records in spoken order without loading the whole session, on a read connection of its own."""
+    query = "SELECT record FROM transcripts WHERE 1 = 1"
+    params = []
+    if guild_id is not None:
+        query += " AND guild_id = ?"
+        params.append(guild_id)
+    if date is not None:
+        query += " AND date = ?"
+        params.append(date)
+    query += " ORDER BY date, begin"
+    connection = sqlite3.connect(path)
+    try:
+        for (record,) in connection.execute(query, params):
+            yield json.loads(record)
+    finally:
+        connection.close()
+
+
+class TranscriptStore:
+    """
+    SQLite store for transcript records written by the transcript consumer.
+
+    Records are keyed by their message id, so a redelivered or replayed message is stored once.
+    """
+
+    def __init__(self, path=TRANSCRIPT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS transcripts (
+                message_id TEXT PRIMARY KEY,
+                guild_id INTEGER,
+                date TEXT,
+                begin TEXT,
+                record TEXT NOT NULL
+            )"""
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS transcripts_guild_time ON transcripts (guild_id, date, begin)")
+        self.connection.commit()
+
+    def add_many(self, records):
+        """Store records that carry a `message_id`, returns how many were new."""
+        rows = [
+            (r["message_id"], r.get("guild_id"), r.get("date"), r.get("begin"), json.dumps(r))
+            for r in records
+        ]
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO transcripts (message_id, guild_id, date, begin, record) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.connection.commit()
+            return self.connection.total_changes - before
+
+    def iter_records(self, guild_id=None, date=None):
+        return iter_store_records(self.path, guild_id, date)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
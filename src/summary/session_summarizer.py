@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import time
+
+SUMMARY_LLM_BASE_URL = os.getenv("SUMMARY_LLM_BASE_URL")
+SUMMARY_LLM_MODEL = os.getenv("SUMMARY_LLM_MODEL")
+SUMMARY_LLM_API_KEY = os.getenv("SUMMARY_LLM_API_KEY")
+# A chunk is summarised once it holds this many (estimated) tokens or spans this many seconds.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+SUMMARY_CHUNK_SECONDS = float(os.getenv("SUMMARY_CHUNK_SECONDS", "600"))
+SUMMARY_FINISH_TIMEOUT_SECONDS = 60
+
+CHUNK_INSTRUCTIONS = (
+    "You are VOLO, the chronicler of a D&D game. Summarise this part of the session transcript "
+    "in a few sentences: what the characters did, decided and discovered. Use the character names."
+)
+FOLD_INSTRUCTIONS = (
+    "You are VOLO, the chronicler of a D&D game. Merge the summary of the session so far with the "
+    "summary of what happened next into one summary of the whole session, in VOLO's voice."
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAICompatibleBackend:
+    """Chat completions against any OpenAI compatible endpoint, set by SUMMARY_LLM_BASE_URL."""
+
+    def __init__(self, model=SUMMARY_LLM_MODEL, base_url=SUMMARY_LLM_BASE_URL, api_key=SUMMARY_LLM_API_KEY):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        # Local servers usually ignore the key, but the client insists on one.
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key or os.getenv("OPENAI_API_KEY") or "none")
+
+    async def complete(self, instructions, text):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": text},
+            ],
+        )
+        return response.choices[0].message.content.strip()
+
+
+def create_summary_backend():
+    """Returns None when no SUMMARY_LLM_MODEL is configured, which turns summaries off."""
+    if not SUMMARY_LLM_MODEL:
+        return None
+    return OpenAICompatibleBackend()
+
+
+class SessionSummarizer:
+    """
+    Builds "VOLO's take" on a session while the game is running.
+
+    Subscribed to a sink's transcript records, it cuts them into chunks by size or time, summarises
+    every closed chunk in the background and folds the chunk summaries, in order, into a rolling
+    summary of the session. At /stop only the last chunk is left, so `finish` returns within seconds.
+
+    :param backend: Anything with `async complete(instructions, text)`, see OpenAICompatibleBackend.
+    :param loop: Event loop the summaries run on.
+    """
+
+    def __init__(self, backend, loop: asyncio.AbstractEventLoop,
+                 chunk_tokens=SUMMARY_CHUNK_TOKENS, chunk_seconds=SUMMARY_CHUNK_SECONDS):
+        self.backend = backend
+        self.loop = loop
+        self.chunk_tokens = chunk_tokens
+        self.chunk_seconds = chunk_seconds
+        self.lines = []
+        self.chunk_chars = 0
+        self.chunk_started = None
+        self.chunk_count = 0
+        self.chunk_summaries = {}
+        self.next_fold = 0
+        self.summary = ""
+        self.fold_lock = asyncio.Lock()
+        self.tasks = set()
+
+    def submit(self, record):
+        """Thread safe, called by the sink for every transcript record."""
+        self.loop.call_soon_threadsafe(self._add, record)
+
+    def _add(self, record):
+        text = (record.get("data") or "").strip()
+        if not text:
+            return
+        name = record.get("character") or record.get("player") or record.get("user_id")
+        line = f"{name}: {text}"
+        if self.chunk_started is None:
+            self.chunk_started = time.time()
+        self.lines.append(line)
+        self.chunk_chars += len(line)
+        # Roughly 4 characters per token.
+        if self.chunk_chars / 4 >= self.chunk_tokens or time.time() - self.chunk_started >= self.chunk_seconds:
+            self._close_chunk()
+
+    def _close_chunk(self):
+        if not self.lines:
+            return
+        task = self.loop.create_task(self._summarize_chunk(self.chunk_count, "\n".join(self.lines)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.chunk_count += 1
+        self.lines = []
+        self.chunk_chars = 0
+        self.chunk_started = None
+
+    async def _summarize_chunk(self, index, text):
+        try:
+            self.chunk_summaries[index] = await self.backend.complete(CHUNK_INSTRUCTIONS, text)
+        except Exception as e:
+            logger.error(f"Error summarising chunk {index}: {e}")
+            self.chunk_summaries[index] = None
+
+        # Chunks can finish out of order, fold them in the order they were spoken.
+        async with self.fold_lock:
+            while self.next_fold in self.chunk_summaries:
+                chunk_summary = self.chunk_summaries.pop(self.next_fold)
+                self.next_fold += 1
+                if not chunk_summary:
+                    continue
+                if not self.summary:
+                    self.summary = chunk_summary
+                    continue
+                try:
+                    self.summary = await self.backend.complete(
+                        FOLD_INSTRUCTIONS,
+                        f"The session so far:\n{self.summary}\n\nWhat happened next:\n{chunk_summary}",
+                    )
+                except Exception as e:
+                    logger.error(f"Error folding chunk summary: {e}")
+                    self.summary += "\n\n" + chunk_summary
+
+    async def finish(self, timeout=SUMMARY_FINISH_TIMEOUT_SECONDS):
+        """Summarise the open chunk and return the session summary, once every chunk is folded in."""
+        self._close_chunk()
+        if self.tasks:
+            done, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+            if pending:
+                logger.warning(f"{len(pending)} chunk summaries did not finish within {timeout}s.")
+        return self.summary
@@ -0,0 +1,59 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class StubCompletionsHandler(BaseHTTPRequestHandler):
+    """
+    Answers `/v1/chat/completions` like an OpenAI compatible server, without a model.
+
+    The reply is the first words of the user message, so summaries stay deterministic when
+    pointing SUMMARY_LLM_BASE_URL at it in tests or local runs.
+    """
+
+    words = 40
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        text = next((m["content"] for m in reversed(request.get("messages", [])) if m.get("role") == "user"), "")
+        content = "Summary: " + " ".join(text.split()[: self.words])
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def create_stub_server(host="127.0.0.1", port=0):
+    """Returns the server unstarted; port 0 picks a free one, see `server.server_address`."""
+    return ThreadingHTTPServer((host, port), StubCompletionsHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI compatible server for session summaries.")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    server = create_stub_server(port=args.port)
+    print(f"Stub completions on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
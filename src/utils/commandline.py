@@ -1,4 +1,5 @@
 import argparse
+import os
 
 
 class CommandLine:
@@ -38,4 +39,45 @@ class CommandLine:
             help="Enable verbose logging"
         )
 
+        parser.add_argument(
+            "--mode",
+            choices=["bot", "worker", "transcript-consumer"],
+            default="bot",
+            help="Run a bot shard, an inference worker serving the shared RabbitMQ queue, or the worker storing published transcripts"
+        )
+
+        parser.add_argument(
+            "--shard-id",
+            type=CommandLine()._optional_int,
+            default=None,
+            help="Shard id of this bot process, guilds are split across shards by Discord"
+        )
+
+        parser.add_argument(
+            "--shard-count",
+            type=CommandLine()._optional_int,
+            default=None,
+            help="Total amount of bot shard processes"
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Concurrent transcriptions of an inference worker, or of the in-process workers with TRANSCRIPTION_METHOD=remote and no RabbitMQ"
+        )
+
+        parser.add_argument(
+            "--profile-startup",
+            action="store_true",
+            help="Log a per-module import time breakdown and the time from login to on_ready"
+        )
+
+        parser.add_argument(
+            "--startup-budget",
+            type=CommandLine()._optional_float,
+            default=os.getenv("STARTUP_BUDGET_SECONDS") or "None",
+            help="With --profile-startup, shut down with exit code 1 when startup to ready takes longer than this many seconds"
+        )
+
         return parser.parse_args()
\ No newline at end of file
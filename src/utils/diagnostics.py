@@ -0,0 +1,116 @@
+import linecache
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+DIAGNOSTICS_DIRECTORY = ".logs/diagnostics"
+MAX_PROFILE_SECONDS = 120
+PROFILE_INTERVAL_SECONDS = 0.01
+REPORT_TOP = 15
+
+logger = logging.getLogger(__name__)
+
+
+def _write_artefact(kind, lines):
+    os.makedirs(DIAGNOSTICS_DIRECTORY, exist_ok=True)
+    path = os.path.join(DIAGNOSTICS_DIRECTORY, f"{datetime.now().strftime('%Y-%m-%d-%H%M%S')}-{kind}.txt")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+def profile_threads(seconds, interval=PROFILE_INTERVAL_SECONDS):
+    """
+    Sample the stacks of every thread for `seconds` and count where they are.
+
+    Blocking, run it off the event loop. Nothing is sampled outside of a call.
+
+    :return: The report lines (top frames by own and by total samples) and the artefact path.
+    """
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    own = Counter()
+    total = Counter()
+    samples = 0
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            thread = names.get(ident, str(ident))
+            leaf = True
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename}:{frame.f_lineno} {code.co_name} [{thread}]"
+                if leaf:
+                    own[key] += 1
+                    leaf = False
+                # Count recursive frames once per sample.
+                if key not in seen:
+                    total[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+        samples += 1
+        time.sleep(interval)
+
+    lines = [f"{samples} samples over {seconds}s of {len(names) - 1} threads", "", "Top frames by own samples:"]
+    lines += [f"{count / samples:6.1%}  {key}" for key, count in own.most_common(REPORT_TOP)]
+    lines += ["", "Top frames by total samples:"]
+    lines += [f"{count / samples:6.1%}  {key}" for key, count in total.most_common(REPORT_TOP)]
+    return lines, _write_artefact("profile", lines)
+
+
+class MemoryTracker:
+    """Tracemalloc snapshot diffs, tracing is only on between `start` and `stop`."""
+
+    def __init__(self):
+        self.baseline = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self.baseline = tracemalloc.take_snapshot()
+
+    def diff(self):
+        """:return: The report lines of the biggest growth since `start` and the artefact path."""
+        if self.baseline is None:
+            raise RuntimeError("Memory tracing is not started.")
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(self.baseline, "lineno")
+        lines = [f"Traced {current / 1024 ** 2:.1f} MiB, peak {peak / 1024 ** 2:.1f} MiB", ""]
+        for stat in stats[:REPORT_TOP]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+7d}  {frame.filename}:{frame.lineno}")
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            if source:
+                lines.append(f"{'':26}{source}")
+        return lines, _write_artefact("memory", lines)
+
+    def stop(self):
+        self.baseline = None
+        tracemalloc.stop()
+
+
+def sink_memory_report(guild_whisper_sinks, supervisor_report=None):
+    """
+    :param supervisor_report: Restart state of every guild's pipeline, see `SinkSupervisor.report`.
+    :return: Report lines with the buffered audio and queue depths of every guild's sink, and the artefact path.
+    """
+    lines = []
+    for guild_id, sink in guild_whisper_sinks.items():
+        stats = sink.memory_stats()
+        lines.append(f"{guild_id}: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+        metrics = dict(sink.metrics)
+        if metrics:
+            lines.append(f"{guild_id} metrics: " + ", ".join(f"{key}={value:g}" for key, value in sorted(metrics.items())))
+    lines = lines or ["No active sinks."]
+    lines += [f"{guild_id}: {report}" for guild_id, report in (supervisor_report or {}).items()]
+    return lines, _write_artefact("sinks", lines)
@@ -2,16 +2,11 @@ import json
 import os
 import tempfile
 
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.platypus import (Frame, Paragraph, Preformatted,
-                                SimpleDocTemplate, Spacer, Table, TableStyle)
-
 
 def add_parchment_background(c, doc):
     """Draw the parchment background on each page."""
+    from reportlab.lib.pagesizes import A4
+
     background_path = os.path.join('assets', 'parchment_background.jpg')
     c.drawImage(background_path, 0, 0, width=A4[0], height=A4[1], mask='auto')
 
@@ -23,6 +18,14 @@ async def pdf_generator(transcriptions, logo_path=None):
     :param logo_path: Optional path to a logo image to include in the PDF.
     :return: Path to the generated PDF file.
     """
+    # ReportLab is only needed for /generate_pdf, keep it out of the bot's startup.
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import (Paragraph, Preformatted,
+                                    SimpleDocTemplate, Spacer)
+
     # Ensure the logs directory exists
     logs_dir = "./.logs/pdfs"
     os.makedirs(logs_dir, exist_ok=True)
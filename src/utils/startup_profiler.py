@@ -0,0 +1,87 @@
+import builtins
+import logging
+import sys
+import time
+
+# Only the standard library is imported here, the profiler is installed before everything else.
+STARTUP_REPORT_TOP = 20
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Measures where cold start time goes for `--profile-startup`.
+
+    Wraps `__import__` to time every module the first time it is imported, keeping the time spent
+    in the module itself apart from the imports it triggers, and marks login and `on_ready`.
+    """
+
+    def __init__(self, budget=None):
+        self.started = time.perf_counter()
+        self.budget = budget
+        self.imports = {}
+        self.stack = []
+        self.login_at = None
+        self.ready_at = None
+        self.over_budget = False
+        self.original_import = builtins.__import__
+
+    @classmethod
+    def install_from_argv(cls, argv=None):
+        """Install before the heavy imports when `--profile-startup` is on the command line."""
+        argv = sys.argv if argv is None else argv
+        if "--profile-startup" not in argv:
+            return None
+        profiler = cls()
+        builtins.__import__ = profiler._import
+        return profiler
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        level_name = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            base = package.rsplit(".", level - 1)[0] if level > 1 else package
+            level_name = f"{base}.{name}" if name else base
+        if level_name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        started = time.perf_counter()
+        self.stack.append(0.0)
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            children = self.stack.pop()
+            elapsed = time.perf_counter() - started
+            if self.stack:
+                self.stack[-1] += elapsed
+            cumulative, own = self.imports.get(level_name, (0.0, 0.0))
+            self.imports[level_name] = (cumulative + elapsed, own + elapsed - children)
+
+    def uninstall(self):
+        builtins.__import__ = self.original_import
+
+    def mark_login(self):
+        self.login_at = time.perf_counter()
+
+    def mark_ready(self):
+        """Log the report once the bot is ready and check the time to ready against the budget."""
+        self.ready_at = time.perf_counter()
+        self.uninstall()
+        total = self.ready_at - self.started
+        import_total = sum(own for _, own in self.imports.values())
+
+        lines = [f"{'self':>8} {'cumulative':>11}  module"]
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (cumulative, own) in ranked[:STARTUP_REPORT_TOP]:
+            lines.append(f"{own * 1000:7.1f}ms {cumulative * 1000:9.1f}ms  {name}")
+        logger.info("Startup import profile:\n" + "\n".join(lines))
+        login_to_ready = self.ready_at - self.login_at if self.login_at else 0.0
+        logger.info(
+            f"Startup: {import_total:.2f}s importing {len(self.imports)} modules, "
+            f"{login_to_ready:.2f}s login to on_ready, {total:.2f}s to ready."
+        )
+
+        if self.budget is not None and total > self.budget:
+            logger.error(f"Startup took {total:.2f}s, over the budget of {self.budget:.2f}s.")
+            self.over_budget = True
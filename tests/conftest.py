@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.sinks.whisper_sink import WhisperSink
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+PACKET_SAMPLES = SAMPLE_RATE // 50
+
+
+def _fake_vc(guild_id=1):
+    """The parts of a py-cord VoiceClient the sink reads."""
+    decoder = SimpleNamespace(SAMPLING_RATE=SAMPLE_RATE, CHANNELS=CHANNELS, SAMPLE_SIZE=CHANNELS * 2)
+    guild = SimpleNamespace(id=guild_id, get_member=lambda user_id: None)
+    return SimpleNamespace(decoder=decoder, channel=SimpleNamespace(guild=guild))
+
+
+def _tone(seconds, frequency=220.0, syllable_rate=0.0):
+    """Stereo 16 bit PCM of a sine, loud enough to pass the audio gate, optionally pulsing like syllables."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    mono = 8000 * np.sin(2 * np.pi * frequency * t)
+    if syllable_rate:
+        mono *= np.abs(np.sin(2 * np.pi * syllable_rate * t))
+    return np.repeat(mono.astype(np.int16), CHANNELS).tobytes()
+
+
+def _tone_packets(seconds, frequency=220.0):
+    """The tone cut into 20 ms packets, as discord delivers them."""
+    pcm = _tone(seconds, frequency)
+    step = PACKET_SAMPLES * CHANNELS * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+def _make_sink(transcribe=None, guild_id=1):
+    """A remote-mode sink on a fake voice client, so nothing loads a model."""
+    sink = WhisperSink(asyncio.Queue(), None, transcriber_type="remote")
+    sink.vc = _fake_vc(guild_id)
+    if transcribe is not None:
+        sink.transcribe = transcribe
+    return sink
+
+
+@pytest.fixture
+def fake_vc():
+    return _fake_vc
+
+
+@pytest.fixture
+def tone():
+    return _tone
+
+
+@pytest.fixture
+def tone_packets():
+    return _tone_packets
+
+
+@pytest.fixture
+def make_sink():
+    return _make_sink
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from src.sinks.admission import AdmissionFilter
+from src.utils import diagnostics
+
+
+class Guild:
+    def __init__(self, members):
+        self.members = members
+        self.lookups = 0
+
+    def get_member(self, user_id):
+        self.lookups += 1
+        return self.members.get(user_id)
+
+
+def member(bot=False, roles=()):
+    return SimpleNamespace(bot=bot, roles=[SimpleNamespace(id=role) for role in roles])
+
+
+def test_bots_ignored_users_and_roles_are_rejected():
+    guild = Guild({1: member(), 2: member(bot=True), 3: member(), 4: member(roles=[40, 41])})
+    admission = AdmissionFilter(ignored_users=[3], ignored_roles=[41], ignore_bots=True)
+
+    assert admission.admits(1, guild)
+    assert not admission.admits(2, guild)
+    assert not admission.admits(3, guild)
+    assert not admission.admits(4, guild)
+    assert AdmissionFilter(ignored_users=[], ignored_roles=[], ignore_bots=False).admits(2, guild)
+
+
+def test_decisions_are_cached_once_the_member_is_known():
+    guild = Guild({})
+    admission = AdmissionFilter(ignored_users=[], ignored_roles=[], ignore_bots=True)
+
+    # Unknown members are admitted and looked up again on the next packet.
+    assert admission.admits(2, guild)
+    assert admission.admits(2, guild)
+    assert guild.lookups == 2
+
+    guild.members[2] = member(bot=True)
+    assert not admission.admits(2, guild)
+    for _ in range(10):
+        assert not admission.admits(2, guild)
+    assert guild.lookups == 3
+
+
+def test_sinks_report_shows_the_sink_metrics(monkeypatch, tmp_path, make_sink):
+    monkeypatch.setattr(diagnostics, "DIAGNOSTICS_DIRECTORY", str(tmp_path))
+    sink = make_sink()
+    sink.metrics["admission_rejected_packets"] += 3
+    sink.metrics["fingerprint_hits"] += 1
+
+    lines, path = diagnostics.sink_memory_report({1: sink})
+
+    assert "fingerprint_hit_rate=" in lines[0]
+    assert lines[1] == "1 metrics: admission_rejected_packets=3, fingerprint_hits=1"
+    assert open(path, encoding="utf-8").read().splitlines() == lines
@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.sinks.audio_gate import frame_energies, pcm_seconds, trim_silence
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+
+
+def stereo(mono):
+    return np.repeat(mono.astype(np.int16), CHANNELS).tobytes()
+
+
+def silence(seconds, level=20):
+    rng = np.random.default_rng(0)
+    return stereo(rng.normal(0, level, int(seconds * SAMPLE_RATE)))
+
+
+def speech(seconds, frequency=200.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    # A syllable rate envelope so the level moves like speech does.
+    return stereo(6000 * np.sin(2 * np.pi * frequency * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)))
+
+
+def click():
+    pcm = np.zeros(int(0.04 * SAMPLE_RATE))
+    pcm[:40] = 20000
+    return stereo(pcm)
+
+
+def recorded_session():
+    """Utterances as the sink commits them: speech padded by the 1.5 s commit window, pops and open mics."""
+    utterances = []
+    for i in range(20):
+        utterances.append(silence(0.3) + speech(1.0 + (i % 4) * 0.5) + silence(1.5))
+    for _ in range(5):
+        utterances.append(silence(0.5) + click() + silence(1.5))
+    for _ in range(5):
+        utterances.append(silence(2.0))
+    return utterances
+
+
+def test_frame_energies_separate_speech_from_silence():
+    energies = frame_energies(silence(0.2) + speech(0.2), SAMPLE_RATE, CHANNELS)
+    assert len(energies) == 20
+    assert energies[:10].max() < -45 < energies[10:].min()
+
+
+def test_gate_drops_noise_and_trims_silence():
+    assert trim_silence(silence(2.0), SAMPLE_RATE, CHANNELS) is None
+    assert trim_silence(silence(0.5) + click() + silence(1.5), SAMPLE_RATE, CHANNELS) is None
+
+    trimmed = trim_silence(silence(0.3) + speech(1.0) + silence(1.5), SAMPLE_RATE, CHANNELS)
+    # The speech plus at most the 200 ms of padding on either side is kept.
+    assert 1.0 <= pcm_seconds(len(trimmed), SAMPLE_RATE, CHANNELS) <= 1.45
+
+
+def test_gate_saves_inference_seconds_on_a_recorded_session():
+    sent = kept = 0.0
+    for pcm in recorded_session():
+        sent += pcm_seconds(len(pcm), SAMPLE_RATE, CHANNELS)
+        trimmed = trim_silence(pcm, SAMPLE_RATE, CHANNELS)
+        if trimmed is not None:
+            kept += pcm_seconds(len(trimmed), SAMPLE_RATE, CHANNELS)
+    speech_seconds = sum(1.0 + (i % 4) * 0.5 for i in range(20))
+    assert kept >= speech_seconds
+    # About half of the 91 seconds sent are padding, pops and open mics.
+    assert (sent - kept) / sent > 0.45
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.sinks.crosstalk import CrossTalkDetector, energy_envelope
+
+SAMPLE_RATE = 48000
+PACKET_SECONDS = 0.02
+
+
+def talker(seed, seconds=3.0):
+    """A speech like stream: noise shaped by a random syllable envelope."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    syllables = np.repeat(rng.uniform(0.05, 1.0, int(seconds * 5) + 1), SAMPLE_RATE // 5)[:n]
+    return rng.normal(0, 1, n) * syllables
+
+
+def packets(signal, gain, start=1000.0):
+    """Split a mono signal into stereo 16 bit packets with their arrival times."""
+    pcm = np.repeat(np.clip(signal * gain, -32768, 32767).astype(np.int16), 2).tobytes()
+    step = int(PACKET_SECONDS * SAMPLE_RATE) * 4
+    chunks = [pcm[i:i + step] for i in range(0, len(pcm), step)]
+    return chunks, [start + i * PACKET_SECONDS for i in range(len(chunks))]
+
+
+def test_scaled_copy_of_a_louder_stream_is_bleed():
+    voice = talker(1)
+    rng = np.random.default_rng(2)
+    start, loud = energy_envelope(*packets(voice, 8000))
+    # The second mic hears the same voice quieter, plus its own room noise.
+    bleed_start, bleed = energy_envelope(*packets(voice + rng.normal(0, 0.05, len(voice)), 1500))
+
+    detector = CrossTalkDetector()
+    assert detector.dominant_stream("bleed", bleed_start, bleed, [("loud", start, loud)]) == "loud"
+    # The louder stream is never skipped as a copy of its own bleed.
+    assert detector.dominant_stream("loud", start, loud, [("bleed", bleed_start, bleed)]) is None
+
+
+def test_independent_streams_are_not_bleed():
+    first_start, first = energy_envelope(*packets(talker(3), 8000))
+    second_start, second = energy_envelope(*packets(talker(4), 3000))
+
+    detector = CrossTalkDetector()
+    assert detector.dominant_stream("second", second_start, second, [("first", first_start, first)]) is None
+
+
+def test_remembered_utterances_still_catch_late_bleed():
+    voice = talker(5)
+    start, loud = energy_envelope(*packets(voice, 8000))
+    detector = CrossTalkDetector()
+    detector.remember("loud", start, loud)
+
+    bleed_start, bleed = energy_envelope(*packets(voice, 1200))
+    assert detector.dominant_stream("bleed", bleed_start, bleed, []) == "loud"
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+
+def written(sink):
+    records = []
+    while not sink.transcription_output_queue.empty():
+        records.append(json.loads(sink.transcription_output_queue.get_nowait()))
+    return records
+
+
+def test_drain_flushes_every_speaker_on_stop(make_sink, tone_packets):
+    sink = make_sink(lambda speaker, model=None: f"words of {speaker.user}")
+    sink.start_voice_thread()
+    # Nobody has been silent for the commit window yet, everything is still buffered on stop.
+    for packet in tone_packets(1.0):
+        for user in (11, 12, 13):
+            sink.write(packet, user)
+
+    summary = sink.drain(timeout=5)
+
+    assert summary["lost"] == 0
+    assert summary["flushed"] == 3
+    assert sorted(record["user_id"] for record in written(sink)) == [11, 12, 13]
+    assert not sink.speakers
+
+
+def test_drain_takes_over_inference_the_voice_thread_waits_on(make_sink, tone_packets):
+    release = threading.Event()
+    dispatched = threading.Event()
+
+    def slow_transcribe(speaker, model=None):
+        dispatched.set()
+        release.wait(5)
+        return f"words of {speaker.user}"
+
+    sink = make_sink(slow_transcribe)
+    # Packets older than the silence window are dispatched by the voice thread right away.
+    past = time.time() - 2
+    for i, packet in enumerate(tone_packets(1.0)):
+        sink.voice_queue.put_nowait([21, packet, past + i * 0.02])
+    sink.start_voice_thread()
+    assert dispatched.wait(5)
+
+    summary = sink.drain(timeout=0.2)
+    release.set()
+    sink.voice_thread.join(5)
+
+    # The utterance missed the deadline and there is no fallback, it is lost and the
+    # voice thread must not write it behind drain's back.
+    assert not sink.voice_thread.is_alive()
+    assert summary["lost"] == 1
+    assert written(sink) == []
+
+
+def test_drain_flushes_buffered_speakers_while_the_voice_thread_is_busy(make_sink, tone_packets):
+    release = threading.Event()
+    dispatched = threading.Event()
+
+    def transcribe(speaker, model=None):
+        if speaker.user == 30:
+            dispatched.set()
+            release.wait(5)
+        return f"words of {speaker.user}"
+
+    sink = make_sink(transcribe)
+    past = time.time() - 2
+    for i, packet in enumerate(tone_packets(1.0)):
+        sink.voice_queue.put_nowait([30, packet, past + i * 0.02])
+    sink.start_voice_thread()
+    assert dispatched.wait(5)
+    for packet in tone_packets(1.0):
+        for user in (31, 32):
+            sink.write(packet, user)
+
+    started = time.time()
+    summary = sink.drain(timeout=2)
+    release.set()
+
+    # The buffered speakers get the whole deadline, only the long inference misses it.
+    assert time.time() - started < 2.5
+    assert summary["flushed"] == 2
+    assert summary["lost"] == 1
+    assert sorted(record["user_id"] for record in written(sink)) == [31, 32]
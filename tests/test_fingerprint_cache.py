@@ -0,0 +1,16 @@
+from src.sinks import whisper_sink
+from src.sinks.fingerprint_cache import FingerprintCache
+from src.sinks.whisper_sink import Speaker
+
+
+def test_cached_transcriptions_stay_in_their_guild(monkeypatch, make_sink, tone):
+    monkeypatch.setattr(whisper_sink, "fingerprint_cache", FingerprintCache())
+    first, other = make_sink(guild_id=1), make_sink(guild_id=2)
+    clip = tone(2.0, 330, syllable_rate=1.5)
+
+    speaker = Speaker(7, None, None, clip)
+    assert not first._is_repeated_clip(speaker)
+    whisper_sink.fingerprint_cache.put((1, speaker.fingerprint), "roll for initiative")
+
+    assert first._is_repeated_clip(Speaker(7, None, None, clip))
+    assert not other._is_repeated_clip(Speaker(7, None, None, clip))
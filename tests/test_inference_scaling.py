@@ -0,0 +1,79 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+from src.inference.broker import InMemoryBroker
+from src.inference.client import InferenceClient
+from src.inference.worker import InferenceWorker
+from src.sinks import whisper_sink
+
+INFERENCE_SECONDS = 0.05
+UTTERANCES = 24
+
+
+def silent_wav():
+    wav = io.BytesIO()
+    with wave.open(wav, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(16000)
+        writer.writeframes(bytes(3200))
+    return wav.getvalue()
+
+
+def model_with_slots(num_workers):
+    """A transcribe_fn that, like faster-whisper, runs at most num_workers calls at once."""
+    slots = threading.Semaphore(num_workers)
+
+    def transcribe(wav_file, prompt, language):
+        with slots:
+            time.sleep(INFERENCE_SECONDS)
+        return "hello", "en"
+
+    return transcribe
+
+
+async def throughput(workers, concurrency, num_workers):
+    broker = InMemoryBroker()
+    transcribe = model_with_slots(num_workers)
+    pool = [InferenceWorker(broker, transcribe, concurrency) for _ in range(workers)]
+    for worker in pool:
+        await worker.start()
+    client = InferenceClient(broker, timeout=10)
+    await client.start()
+    wav = silent_wav()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(client.transcribe(wav) for _ in range(UTTERANCES)))
+    elapsed = time.perf_counter() - started
+
+    for worker in pool:
+        worker.close()
+    await broker.close()
+    assert [result["text"] for result in results] == ["hello"] * UTTERANCES
+    return UTTERANCES / elapsed
+
+
+def test_worker_concurrency_scales_throughput():
+    single = asyncio.run(throughput(workers=1, concurrency=1, num_workers=1))
+    concurrent = asyncio.run(throughput(workers=1, concurrency=4, num_workers=4))
+    sharded = asyncio.run(throughput(workers=4, concurrency=1, num_workers=4))
+    assert concurrent > 2.5 * single
+    assert sharded > 2.5 * single
+
+
+def test_model_is_built_for_the_worker_concurrency(monkeypatch):
+    built = []
+    fake_faster_whisper = SimpleNamespace(WhisperModel=lambda *args, **kwargs: built.append(kwargs) or object())
+    monkeypatch.setitem(sys.modules, "faster_whisper", fake_faster_whisper)
+    monkeypatch.setattr(whisper_sink, "_whisper_device", lambda: "cpu")
+    monkeypatch.setattr(whisper_sink, "audio_model", None)
+
+    model = whisper_sink.get_audio_model(num_workers=4)
+
+    assert whisper_sink.get_audio_model(num_workers=1) is model
+    assert [kwargs["num_workers"] for kwargs in built] == [4]
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import yaml
+
+from src.bot.participants import ParticipantIndex
+
+
+def member(user_id, name, display_name):
+    return SimpleNamespace(id=user_id, name=name, display_name=display_name, bot=False)
+
+
+def test_overlapping_persists_keep_the_newest_names(tmp_path):
+    guild = SimpleNamespace(id=5, get_member=lambda user_id: None)
+    participants = ParticipantIndex(guild, directory=str(tmp_path))
+    write = participants._write
+
+    def slow_first_write(entries):
+        # Without serialised writes the older snapshot would be replaced last.
+        if entries[1]["character"] == "Grog":
+            time.sleep(0.2)
+        write(entries)
+
+    participants._write = slow_first_write
+
+    async def scenario():
+        participants.add_member(member(1, "travis", "Grog"))
+        first = asyncio.create_task(participants.persist())
+        await asyncio.sleep(0.05)
+        participants.add_member(member(1, "travis", "Grog Strongjaw"), overwrite=True)
+        await asyncio.gather(first, participants.persist())
+
+    asyncio.run(scenario())
+    with open(tmp_path / "5.yml", encoding="utf-8") as file:
+        assert yaml.safe_load(file)[1]["character"] == "Grog Strongjaw"
+    assert not participants.dirty
+
+
+def test_dropping_an_override_is_persisted(tmp_path):
+    guild = SimpleNamespace(id=6, get_member=lambda user_id: None)
+    base_map = {2: {"player": "laura", "character": "Vex"}}
+    participants = ParticipantIndex(guild, base_map, directory=str(tmp_path))
+    participants.add_member(member(2, "laura", "Vex'ahlia"), overwrite=True)
+    asyncio.run(participants.persist())
+
+    participants.add_member(member(2, "laura", "Vex"), overwrite=True)
+    assert participants.dirty
+    asyncio.run(participants.persist())
+    with open(tmp_path / "6.yml", encoding="utf-8") as file:
+        assert yaml.safe_load(file) == {}
@@ -0,0 +1,104 @@
+import io
+import wave
+from types import SimpleNamespace
+
+from src.sinks import whisper_sink
+from src.sinks.prompt_context import MAX_HISTORY_CHARS, MAX_PROMPT_CHARS, PromptContext, load_glossary
+
+
+def test_load_glossary_reads_all_three_formats(tmp_path):
+    as_list = tmp_path / "list.yml"
+    as_list.write_text("- Vox Machina\n- Whitestone\n", encoding="utf-8")
+    as_mapping = tmp_path / "mapping.yml"
+    as_mapping.write_text("places:\n  - Emon\n  - Whitestone\nfoes:\n  - Briarwood\n", encoding="utf-8")
+    as_text = tmp_path / "terms.txt"
+    as_text.write_text("Tal'Dorei\n\n  Raishan  \n", encoding="utf-8")
+
+    assert load_glossary(str(as_list)) == ["Vox Machina", "Whitestone"]
+    assert load_glossary(str(as_mapping)) == ["Emon", "Whitestone", "Briarwood"]
+    assert load_glossary(str(as_text)) == ["Tal'Dorei", "Raishan"]
+    assert load_glossary(str(tmp_path / "missing.yml")) == []
+    assert load_glossary(None) == []
+
+
+def test_names_are_deduplicated_and_kept_out_of_the_terms():
+    player_map = {
+        1: {"player": "Laura", "character": "Vex"},
+        2: {"player": "Liam", "character": "Vax"},
+        3: {"player": "Laura", "character": "Trinket"},
+    }
+    context = PromptContext(player_map, ["Vex", "Whitestone"], base_prompt="Base.")
+
+    assert context.vocabulary == "Base. Names: Vex, Laura, Vax, Liam, Trinket. Terms: Whitestone."
+
+
+def test_vocabulary_is_trimmed_at_a_separator():
+    glossary = [f"Glossaryterm{i}" for i in range(200)]
+    context = PromptContext({}, glossary, base_prompt="Base.")
+    limit = MAX_PROMPT_CHARS - MAX_HISTORY_CHARS
+
+    assert len(context.vocabulary) <= limit
+    last_term = context.vocabulary.rsplit(", ", 1)[1]
+    assert last_term in glossary
+    # The history still fits into whisper's prompt window.
+    context.commit(1, "x" * 1000)
+    assert len(context.prompt_for(1)) <= MAX_PROMPT_CHARS
+
+
+def test_prompt_carries_each_speakers_last_text():
+    context = PromptContext({}, [], base_prompt="Base.")
+    context.commit(1, "  We rest at the inn.  ")
+    context.commit(2, "")
+
+    assert context.prompt_for(1) == "Base. We rest at the inn."
+    assert context.prompt_for(2) == "Base."
+    context.commit(1, "Then we ride for Whitestone.")
+    assert context.prompt_for(1) == "Base. Then we ride for Whitestone."
+
+
+def wav_bytes(seconds=0.5, rate=16000):
+    data = io.BytesIO()
+    with wave.open(data, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(bytes(int(seconds * rate) * 2))
+    return data
+
+
+def test_language_is_detected_once_per_speaker_in_auto_mode(monkeypatch, make_sink):
+    calls = []
+
+    def fake_local_transcribe(temp_file, prompt=None, language=None, model=None):
+        calls.append((prompt, language))
+        return "Hallo", "de"
+
+    monkeypatch.setattr(whisper_sink, "WHISPER_LANGUAGE", "auto")
+    monkeypatch.setattr(whisper_sink, "local_transcribe", fake_local_transcribe)
+    sink = make_sink()
+    sink.transcriber_type = "local"
+    sink.prompt_context = PromptContext({}, [], base_prompt="Base.")
+
+    assert sink.transcribe_audio(wav_bytes(), user=1) == "Hallo"
+    sink.prompt_context.commit(1, "Hallo")
+    sink.transcribe_audio(wav_bytes(), user=1)
+
+    assert calls == [("Base.", None), ("Base. Hallo", "de")]
+    assert sink.prompt_context.language_for(1) == "de"
+    assert sink.prompt_context.language_for(2, "en") == "en"
+
+
+def test_beam_size_and_prompt_reach_the_model():
+    seen = {}
+
+    class FakeModel:
+        def transcribe(self, audio, **kwargs):
+            seen.update(kwargs)
+            return [SimpleNamespace(text=" Roll"), SimpleNamespace(text=" initiative.")], SimpleNamespace(language="en")
+
+    text, language = whisper_sink.local_transcribe(wav_bytes(), "Base. Names: Vex.", "en", model=FakeModel())
+
+    assert (text, language) == (" Roll initiative.", "en")
+    assert seen["beam_size"] == whisper_sink.WHISPER_BEAM_SIZE
+    assert seen["initial_prompt"] == "Base. Names: Vex."
+    assert seen["language"] == "en"
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.summary.session_summarizer import FOLD_INSTRUCTIONS, OpenAICompatibleBackend, SessionSummarizer
+from src.summary.stub_server import create_stub_server
+
+pytest.importorskip("openai")
+
+
+@pytest.fixture
+def stub_url():
+    server = create_stub_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+class RecordingBackend:
+    """Wraps the stub backend, delaying or failing calls to exercise the summarizer."""
+
+    def __init__(self, base_url, delays=None, fail_folds=False):
+        self.backend = OpenAICompatibleBackend(model="stub", base_url=base_url, api_key="none")
+        self.delays = delays or {}
+        self.fail_folds = fail_folds
+        self.chunks_done = []
+        self.folds = []
+
+    async def complete(self, instructions, text):
+        if instructions == FOLD_INSTRUCTIONS:
+            self.folds.append(text)
+            if self.fail_folds:
+                raise RuntimeError("backend unavailable")
+        else:
+            await asyncio.sleep(self.delays.get(text.split(":")[0], 0))
+        result = await self.backend.complete(instructions, text)
+        if instructions != FOLD_INSTRUCTIONS:
+            self.chunks_done.append(text.split(":")[0])
+        return result
+
+
+def records(*characters):
+    return [{"character": character, "data": f"{character} speaks for the chunk."} for character in characters]
+
+
+async def summarise(backend, characters, timeout=10):
+    summarizer = SessionSummarizer(backend, asyncio.get_running_loop(), chunk_tokens=1)
+    # chunk_tokens=1 closes a chunk after every record.
+    for record in records(*characters):
+        summarizer._add(record)
+    started = time.monotonic()
+    summary = await summarizer.finish(timeout=timeout)
+    return summary, time.monotonic() - started
+
+
+def test_chunks_finishing_out_of_order_are_folded_in_spoken_order(stub_url):
+    backend = RecordingBackend(stub_url, delays={"Vex": 0.3})
+    summary, _ = asyncio.run(summarise(backend, ["Vex", "Grog", "Pike"]))
+
+    # Grog and Pike race each other, only the delayed Vex chunk is sure to finish last.
+    assert backend.chunks_done[-1] == "Vex"
+    assert len(backend.folds) == 2
+    assert backend.folds[0].index("Vex") < backend.folds[0].index("Grog")
+    assert "Pike" in backend.folds[1].rsplit("What happened next:", 1)[1]
+    assert summary.startswith("Summary:")
+
+
+def test_fold_errors_fall_back_to_appending_the_chunk_summary(stub_url):
+    backend = RecordingBackend(stub_url, fail_folds=True)
+    summary, _ = asyncio.run(summarise(backend, ["Vex", "Grog"]))
+
+    parts = summary.split("\n\n")
+    assert len(parts) == 2
+    assert "Vex" in parts[0] and "Grog" in parts[1]
+
+
+def test_finish_waits_at_most_its_timeout(stub_url):
+    backend = RecordingBackend(stub_url, delays={"Grog": 2})
+    summary, elapsed = asyncio.run(summarise(backend, ["Vex", "Grog"], timeout=0.3))
+
+    assert elapsed < 1
+    assert "Vex" in summary and "Grog" not in summary
@@ -0,0 +1,58 @@
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.sinks import whisper_sink
+from src.sinks.fingerprint_cache import FingerprintCache
+
+INFERENCE_SECONDS = 0.5
+
+
+def replay_utterance(make_sink, tone_packets):
+    """Replay one second of speech that ends now, and return the sink's first text latency."""
+    def transcribe(speaker, model=None):
+        time.sleep(INFERENCE_SECONDS)
+        return "I cast fireball"
+
+    sink = make_sink(transcribe)
+    now = time.time()
+    for i, packet in enumerate(tone_packets(1.0)):
+        sink.voice_queue.put_nowait([5, packet, now - 1 + i * 0.02])
+    sink.start_voice_thread()
+
+    deadline = time.time() + 10
+    while not sink.first_text_latencies and time.time() < deadline:
+        time.sleep(0.02)
+    sink.stop_voice_thread(timeout=5)
+    assert sink.first_text_latencies, "Nothing was transcribed."
+    return sink.first_text_latencies[0], sink.metrics
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_first_text_latency(monkeypatch, make_sink, tone_packets, speculative):
+    monkeypatch.setattr(whisper_sink, "SPECULATIVE_TRANSCRIPTION", speculative)
+    # Both runs replay the same clip, it must not be answered from the fingerprint cache.
+    monkeypatch.setattr(whisper_sink, "fingerprint_cache", FingerprintCache())
+    latency, metrics = replay_utterance(make_sink, tone_packets)
+    silence = whisper_sink.SILENCE_COMMIT_SECONDS
+    if speculative:
+        # Inference ran during the pause, the text is ready as soon as the silence window closes.
+        assert metrics["speculative_committed"] == 1
+        assert latency < silence + INFERENCE_SECONDS / 2
+    else:
+        assert latency >= silence + INFERENCE_SECONDS
+
+
+def test_speculation_gets_model_slots_of_its_own(monkeypatch):
+    built = []
+    fake_faster_whisper = SimpleNamespace(WhisperModel=lambda *args, **kwargs: built.append(kwargs) or object())
+    monkeypatch.setitem(sys.modules, "faster_whisper", fake_faster_whisper)
+    monkeypatch.setattr(whisper_sink, "_whisper_device", lambda: "cpu")
+    monkeypatch.setattr(whisper_sink, "audio_model", None)
+    monkeypatch.setattr(whisper_sink, "SPECULATIVE_TRANSCRIPTION", True)
+
+    whisper_sink.get_audio_model()
+
+    assert built[0]["num_workers"] == whisper_sink.WHISPER_NUM_WORKERS + whisper_sink.SPECULATIVE_BUDGET
@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+
+# Cold import of the bot, generous enough for CI machines, set lower to catch regressions locally.
+STARTUP_IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", "5"))
+HEAVY_MODULES = ["torch", "faster_whisper", "openai", "reportlab", "speech_recognition", "aio_pika"]
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import src.bot.volo_bot
+import src.utils.pdf_generator
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_bot_imports_without_heavy_dependencies_within_budget():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, DISCORD_CHANNEL_ID=os.getenv("DISCORD_CHANNEL_ID", "0"))
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=root, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["seconds"] < STARTUP_IMPORT_BUDGET_SECONDS
@@ -0,0 +1,95 @@
+import gzip
+import json
+import logging
+import os
+import tracemalloc
+from datetime import datetime
+
+import pytest
+
+from src.exporters import transcript_export
+from src.exporters.transcript_export import export_transcript, iter_log_records
+
+RECORDS = 50_000
+
+
+def write_log(path, count=RECORDS):
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(count):
+            seconds = i * 3
+            record = {
+                "date": "2026-10-19",
+                "begin": f"{18 + seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000",
+                "end": f"{18 + seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60 + 2:02d}.500",
+                "user_id": i % 5,
+                "player": f"player{i % 5}",
+                "character": f"character{i % 5}",
+                "event_source": "Discord",
+                "guild_id": 1 if i % 10 else 2,
+                "data": f"Utterance {i}, the party argues about the loot split once again.",
+            }
+            file.write(json.dumps(record) + "\n")
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "srt"])
+def test_export_memory_stays_flat_for_long_sessions(tmp_path, fmt):
+    log = tmp_path / "transcription.log"
+    write_log(log)
+
+    tracemalloc.start()
+    try:
+        paths = export_transcript(iter_log_records(log, guild_id=1), fmt, tmp_path / "out")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The log is over 12 MB, the export never holds more than a few records and gzip's buffers.
+    assert os.path.getsize(log) > 12 * 1024 ** 2
+    assert peak < 2 * 1024 ** 2
+    assert len(paths) == 1
+
+
+def test_export_splits_into_complete_gzip_parts(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_export, "PART_MARGIN_BYTES", 16 * 1024)
+    log = tmp_path / "transcription.log"
+    write_log(log, 20_000)
+
+    paths = export_transcript(iter_log_records(log), "jsonl", tmp_path / "out", part_bytes=64 * 1024)
+
+    assert len(paths) > 1
+    records = []
+    for path in paths:
+        assert os.path.getsize(path) <= 64 * 1024
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            records += [json.loads(line) for line in file]
+    assert [record["data"] for record in records] == [record["data"] for record in iter_log_records(log)]
+
+
+def test_a_day_is_read_across_the_logs_that_hold_it(tmp_path):
+    def record(date, data):
+        return json.dumps({"date": date, "begin": "23:59:58.000", "guild_id": 1, "data": data}) + "\n"
+
+    # A bot started the day before, and an utterance that was written just after midnight.
+    (tmp_path / "2026-10-18-transcription.log").write_text(
+        record("2026-10-18", "old") + record("2026-10-19", "late night"), encoding="utf-8")
+    (tmp_path / "2026-10-20-transcription.log").write_text(
+        record("2026-10-19", "across midnight") + record("2026-10-20", "next day"), encoding="utf-8")
+    (tmp_path / "2026-10-22-transcription.log").write_text(record("2026-10-22", "later"), encoding="utf-8")
+
+    records = transcript_export.iter_day_records("2026-10-19", guild_id=1, directory=str(tmp_path))
+
+    assert [record["data"] for record in records] == ["late night", "across midnight"]
+
+
+def test_transcription_log_rotates_at_midnight(tmp_path):
+    handler = transcript_export.DailyTranscriptLogHandler(str(tmp_path))
+    try:
+        for created, message in (("2026-10-19 23:59:59", "before"), ("2026-10-20 00:00:01", "after")):
+            entry = logging.LogRecord("transcription", logging.INFO, __file__, 0, message, None, None)
+            entry.created = datetime.strptime(created, "%Y-%m-%d %H:%M:%S").timestamp()
+            handler.emit(entry)
+    finally:
+        handler.close()
+
+    assert (tmp_path / "2026-10-19-transcription.log").read_text(encoding="utf-8").endswith("before\n")
+    assert (tmp_path / "2026-10-20-transcription.log").read_text(encoding="utf-8") == "after\n"
@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+from src.inference.broker import InMemoryBroker
+from src.publishers.transcript_consumer import TranscriptConsumer
+from src.publishers.transcript_publisher import TRANSCRIPT_QUEUE, TranscriptPublisher, message_id_for
+from src.store.transcript_store import TranscriptStore
+
+
+class FlakyBroker(InMemoryBroker):
+    """In-memory broker whose publishes fail while `down` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+        self.published = []
+
+    async def publish(self, queue_name, body: bytes, message_id=None, **kwargs):
+        if self.down:
+            raise ConnectionError("broker is down")
+        self.published.append(message_id)
+        await super().publish(queue_name, body, message_id=message_id, **kwargs)
+
+
+def record(i, guild_id=1):
+    return {"date": "2026-10-19", "begin": f"20:00:{i:02d}.000", "user_id": 7, "guild_id": guild_id,
+            "data": f"line {i}"}
+
+
+async def wait_for(condition, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "Timed out."
+        await asyncio.sleep(0.01)
+
+
+def test_records_are_published_in_batches(tmp_path):
+    async def scenario():
+        broker = FlakyBroker()
+        publisher = TranscriptPublisher(broker, asyncio.get_running_loop(), batch_size=50, flush_interval=0.2,
+                                        spill_path=str(tmp_path / "spill.jsonl"))
+        batches = []
+        publish_or_spill = publisher._publish_or_spill
+
+        async def recording(batch):
+            batches.append(len(batch))
+            return await publish_or_spill(batch)
+
+        publisher._publish_or_spill = recording
+        await publisher.start()
+        for i in range(120):
+            publisher.submit(record(i))
+        await wait_for(lambda: publisher.published == 120)
+        await publisher.close()
+        return batches
+
+    assert asyncio.run(scenario()) == [50, 50, 20]
+
+
+def test_records_spill_while_the_broker_is_down_and_are_replayed(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+
+    async def scenario():
+        broker = FlakyBroker()
+        broker.down = True
+        publisher = TranscriptPublisher(broker, asyncio.get_running_loop(), batch_size=4, flush_interval=0.05,
+                                        spill_path=str(spill_path))
+        await publisher.start()
+        for i in range(10):
+            publisher.submit(record(i))
+        await wait_for(lambda: publisher.spilled == 10)
+        assert spill_path.exists() and not broker.published
+
+        broker.down = False
+        publisher.submit(record(10))
+        await wait_for(lambda: publisher.published == 11)
+        await publisher.close()
+        return broker.published
+
+    published = asyncio.run(scenario())
+    assert sorted(published) == sorted(message_id_for(record(i)) for i in range(11))
+    assert not spill_path.exists()
+    assert not (tmp_path / "spill.jsonl.replay").exists()
+
+
+def test_a_replay_cut_short_is_picked_up_on_start(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    # Left behind when close() cancelled a replay.
+    with open(str(spill_path) + ".replay", "w", encoding="utf-8") as file:
+        for i in range(7):
+            file.write(json.dumps(dict(record(i), message_id=message_id_for(record(i)))) + "\n")
+
+    async def scenario():
+        broker = FlakyBroker()
+        publisher = TranscriptPublisher(broker, asyncio.get_running_loop(), batch_size=3,
+                                        spill_path=str(spill_path))
+        await publisher.start()
+        await wait_for(lambda: publisher.published == 7)
+        await publisher.close()
+        return broker.published
+
+    assert len(asyncio.run(scenario())) == 7
+    assert not (tmp_path / "spill.jsonl.replay").exists()
+
+
+def test_duplicate_message_ids_are_stored_once(tmp_path):
+    async def scenario():
+        broker = InMemoryBroker()
+        store = TranscriptStore(str(tmp_path / "transcripts.sqlite3"))
+        consumer = TranscriptConsumer(broker, store)
+        await consumer.start()
+        # A batch resent after close() or a replay publishes the same utterances again.
+        for _ in range(2):
+            for i in range(5):
+                body = json.dumps(dict(record(i), message_id=message_id_for(record(i)))).encode("utf-8")
+                await broker.publish(TRANSCRIPT_QUEUE, body, message_id=message_id_for(record(i)))
+        await wait_for(lambda: consumer.stored >= 5)
+        # Give the duplicates the same chance to be written.
+        await asyncio.sleep(0.2)
+        await broker.close()
+        records = list(store.iter_records(guild_id=1))
+        store.close()
+        return consumer.stored, records
+
+    stored, records = asyncio.run(scenario())
+    assert stored == 5
+    assert [r["data"] for r in records] == [f"line {i}" for i in range(5)]